@@ -0,0 +1,195 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from scoring import SECTION_ORDER, GROUP_TO_SUBJECTS_MAP, build_item_matrix, answers_to_matrix, score_matrix, top_subjects_mask
+
+# 적응형 모드 기준
+MIN_ITEMS_PER_SUBJECT = 3   # 과목마다 이만큼은 응답해야 순위를 판단 (첫 단계에서 모든 과목을 이만큼 채움)
+FOLLOW_UP_ITEMS_PER_SUBJECT = 3  # 추가 단계에서 경합 중인 과목 하나당 더 묻는 문항 수
+MAX_FOLLOW_UPS = 2          # 추가 단계 최대 횟수 (제출 횟수는 최대 1 + MAX_FOLLOW_UPS번)
+CONFIDENCE = 0.96           # 인접한 두 과목 순위가 맞을 확률이 모두 이 이상이면 섹션 종료
+PRIOR_SD = 1.0              # 응답이 부족할 때 쓰는 문항 점수 표준편차
+MIN_SD = 0.5                # 응답이 모두 같아도 이보다 작게 보지 않음
+
+
+def section_items(df):
+    """섹션별 문항 번호 목록 (SECTION_ORDER 순서)"""
+    ids = df['번호'].astype(str)
+    return {s: ids[df['카테고리'] == s].tolist() for s in SECTION_ORDER if s in df['카테고리'].unique()}
+
+
+def section_subjects(model, section_name, q_ids):
+    """섹션 문항이 측정하는 과목 목록 (교과군 과목 중 실제 문항이 있는 것)"""
+    rows = [model['q_ids'].index(q) for q in q_ids]
+    measured = model['incidence'][rows].sum(axis=0) > 0
+    subjects = [s for s, m in zip(model['subjects'], measured) if m]
+    return [s for s in GROUP_TO_SUBJECTS_MAP.get(section_name, subjects) if s in subjects]
+
+
+def subject_estimates(model, responses, subjects):
+    """응답한 문항으로 과목별 평균 점수, 표준편차, 표준오차, 응답 문항 수, 전체 문항 수를 추정하는 함수
+
+    표준오차에는 유한 모집단 보정 sqrt((N - n) / (N - 1))을 곱해, 과목 문항 N개 중 n개만 응답했을 때
+    전체 문항 점수와 얼마나 다를지를 나타냅니다. (모든 문항에 응답한 과목은 0)
+    """
+    answers = np.array([responses.get(q, np.nan) for q in model['q_ids']], dtype=float)
+    cols = [model['subjects'].index(s) for s in subjects]
+    # 문항별 과목 점수 (정: 응답, 역: 6 - 응답)
+    linked = model['incidence'][:, cols] > 0
+    mask = ~np.isnan(answers)[:, None] & linked
+    item_scores = model['sign'][:, cols] * np.nan_to_num(answers)[:, None] + 6.0 * model['reverse'][:, cols]
+    n = mask.sum(axis=0)
+    total = linked.sum(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = np.where(mask, item_scores, 0.0).sum(axis=0) / n
+        var = np.where(mask, (item_scores - mean) ** 2, 0.0).sum(axis=0) / (n - 1)
+        sd = np.where(n >= 2, np.maximum(np.sqrt(var), MIN_SD), PRIOR_SD)
+        fpc = np.where(total > 1, np.sqrt(np.clip((total - n) / (total - 1), 0, None)), 0.0)
+        se = np.where(n > 0, sd / np.sqrt(n) * fpc, np.inf)
+    return pd.DataFrame({'mean': mean, 'sd': sd, 'se': se, 'n': n, 'total': total},
+                        index=pd.Index(subjects, name='subject'))
+
+
+def ranking_confidence(estimates):
+    """현재 순위에서 인접한 과목 쌍마다 순서가 맞을 확률을 계산하고, 그 최솟값과 경합 중인 과목을 돌려주는 함수"""
+    if (estimates['n'] < MIN_ITEMS_PER_SUBJECT).any():
+        return 0.0, set(estimates.index)
+    ranked = estimates.sort_values('mean', ascending=False, kind='stable')
+    names, mean, se = ranked.index.tolist(), ranked['mean'].to_numpy(), ranked['se'].to_numpy()
+    confidence, contention = 1.0, set()
+    for i in range(len(names) - 1):
+        spread = math.sqrt(se[i] ** 2 + se[i + 1] ** 2)
+        # 두 과목 모두 모든 문항에 응답했으면 전체 문항 순위와 같으므로 확정
+        p = 1.0 if spread == 0 else 0.5 * (1 + math.erf((mean[i] - mean[i + 1]) / spread / math.sqrt(2)))
+        confidence = min(confidence, p)
+        if p < CONFIDENCE:
+            contention |= {names[i], names[i + 1]}
+    return confidence, contention
+
+
+def opening_block(model, q_ids, subjects, rng=None):
+    """섹션의 모든 과목이 MIN_ITEMS_PER_SUBJECT개씩 채워질 때까지 문항을 고르는 함수 (여러 과목에 걸친 문항 우선)"""
+    rng = rng or np.random.default_rng()
+    rows = [model['q_ids'].index(q) for q in q_ids]
+    cols = [model['subjects'].index(s) for s in subjects]
+    covers = model['incidence'][np.ix_(rows, cols)] > 0
+    need = np.full(len(cols), MIN_ITEMS_PER_SUBJECT)
+    order = rng.permutation(len(rows))
+
+    block = []
+    available = np.ones(len(rows), dtype=bool)
+    while (need > 0).any():
+        useful = (covers[order] & (need > 0)).sum(axis=1) * available[order]
+        if useful.max() == 0:
+            break
+        best = order[int(np.argmax(useful))]
+        block.append(q_ids[best])
+        available[best] = False
+        need = need - covers[best]
+    return block
+
+
+def next_batch(model, responses, q_ids, subjects, batch_size=None, rng=None):
+    """경합 중인 과목의 표준오차를 가장 많이 줄이는 문항부터 골라 추가 묶음을 만드는 함수
+
+    과목 j(문항 N개)에 n개 응답이 있을 때 한 문항을 더하면 유한 모집단 보정을 한 분산
+    sd²/n·(N-n)/(N-1)이 sd²·N/((N-1)·n·(n+1))만큼 줄어드는데, 이 양을 정보량으로 보고
+    한 문항씩 고를 때마다 응답 수를 늘려 가며 다시 계산합니다.
+    batch_size를 생략하면 경합 중인 과목 하나당 FOLLOW_UP_ITEMS_PER_SUBJECT개를 고릅니다.
+    """
+    rng = rng or np.random.default_rng()
+    estimates = subject_estimates(model, responses, subjects)
+    _, contention = ranking_confidence(estimates)
+    remaining = [q for q in q_ids if q not in responses]
+    if not remaining or not contention:
+        return []
+    if batch_size is None:
+        batch_size = FOLLOW_UP_ITEMS_PER_SUBJECT * len(contention)
+
+    rows = [model['q_ids'].index(q) for q in remaining]
+    cols = [model['subjects'].index(s) for s in subjects]
+    load = model['incidence'][np.ix_(rows, cols)] * np.array([s in contention for s in subjects])
+    n = estimates['n'].to_numpy(dtype=float)
+    sd = estimates['sd'].to_numpy()
+    total = estimates['total'].to_numpy(dtype=float)
+    scale = np.where(total > 1, total / np.maximum(total - 1, 1), 1.0)
+    # 동점일 때 매번 같은 문항만 나오지 않도록 아주 작은 무작위 값을 더함
+    jitter = rng.random(len(rows)) * 1e-9
+
+    batch = []
+    available = np.ones(len(rows), dtype=bool)
+    for _ in range(min(batch_size, len(rows))):
+        with np.errstate(divide='ignore'):
+            gain = np.where(n > 0, sd ** 2 * scale / (n * (n + 1)), 2 * PRIOR_SD ** 2)
+        info = load @ gain + jitter
+        info[~available] = -np.inf
+        best = int(np.argmax(info))
+        if info[best] <= 1e-6:
+            break
+        batch.append(remaining[best])
+        available[best] = False
+        n = n + (load[best] > 0)
+    return batch
+
+
+def plan_round(model, sections, responses, round_index, rng=None):
+    """한 번의 제출로 보여줄 섹션별 문항 묶음을 정하는 함수 (더 물을 것이 없으면 빈 딕셔너리)
+
+    0단계는 모든 섹션의 첫 묶음(opening_block)을, 1~MAX_FOLLOW_UPS단계는 순위가 아직 불안정한
+    섹션의 추가 묶음(next_batch)을 한 화면에 모아 보여줍니다. 일반 모드는 섹션마다 한 번씩 제출하므로,
+    적응형 모드의 제출 횟수(최대 1 + MAX_FOLLOW_UPS번)는 섹션 수보다 많아지지 않습니다.
+    """
+    if round_index > MAX_FOLLOW_UPS:
+        return {}
+    plan = {}
+    for section_name, q_ids in sections.items():
+        subjects = section_subjects(model, section_name, q_ids)
+        if round_index == 0:
+            block = opening_block(model, q_ids, subjects, rng)
+        else:
+            block = next_batch(model, responses, q_ids, subjects, rng=rng)
+        if block:
+            plan[section_name] = block
+    return plan
+
+
+def run_adaptive(model, sections, answers, rng=None):
+    """전체 응답 기록을 정답지 삼아 적응형 모드를 그대로 재현하고, (실제로 묻게 될 문항의 응답, 제출 횟수)를 돌려주는 함수
+
+    기록에 없는 문항(예: 나중에 CSV에 추가된 문항)은 물을 수 없으므로 처음부터 후보에서 뺍니다.
+    """
+    sections = {name: [q for q in q_ids if q in answers] for name, q_ids in sections.items()}
+    shown, submissions = {}, 0
+    for round_index in range(MAX_FOLLOW_UPS + 1):
+        plan = plan_round(model, sections, shown, round_index, rng)
+        if not plan:
+            break
+        for block in plan.values():
+            shown.update({q: answers[q] for q in block})
+        submissions += 1
+    return shown, submissions
+
+
+def simulate(df, answers_list, top_n=8, seed=0):
+    """전체 문항에 응답한 기록으로 적응형 모드를 재현해 전체 문항 채점과의 차이를 요약하는 함수"""
+    answers_list = list(answers_list)
+    model = build_item_matrix(df)
+    sections = section_items(df)
+    rng = np.random.default_rng(seed)
+    runs = [run_adaptive(model, sections, answers, rng) for answers in answers_list]
+    shown_list = [shown for shown, _ in runs]
+
+    full = pd.DataFrame(score_matrix(model, answers_to_matrix(model, answers_list)), columns=model['subjects'])
+    short = pd.DataFrame(score_matrix(model, answers_to_matrix(model, shown_list), answered_only=True), columns=model['subjects'])
+    full_top, short_top = top_subjects_mask(full, top_n), top_subjects_mask(short, top_n)
+    return {
+        'responses': len(answers_list),
+        'items_ratio': float(np.mean([len(s) / max(len(a), 1) for s, a in zip(shown_list, answers_list)])) if answers_list else np.nan,
+        'submissions': float(np.mean([n for _, n in runs])) if answers_list else np.nan,
+        'full_submissions': len(sections),
+        'mean_abs_diff': float(np.nanmean((short - full).abs().to_numpy())) if answers_list else np.nan,
+        'top_overlap': float(((full_top & short_top).sum(axis=1) / full_top.sum(axis=1)).mean()) if answers_list else np.nan,
+        'by_subject': (short - full).abs().mean(),
+    }
@@ -0,0 +1,430 @@
+"""설문을 서버 없이 브라우저에서 채점하는 정적 HTML로 내보내는 스크립트
+
+결과 화면은 main.py의 결과 페이지와 같이 상위 선호 과목, 과목별 점수, 추가정보(교과군별 과목 안내),
+학년도별 선택과목 목록을 보여줍니다. 선택과목 목록은 번들을 만들 때의 표가 그대로 들어갑니다.
+
+사용법:
+    python build_static.py build default_data.csv -o dist/default.html [--upload-url http://host:8502/responses]
+    python build_static.py serve --port 8502   # 선택: 결과 업로드 수신 서버
+    python build_static.py check default_data.csv --sessions 3000   # 번들 채점이 compute_scores와 같은지 node로 확인
+"""
+import argparse
+import json
+import math
+import os
+import re
+import shutil
+import sqlite3
+import subprocess
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from scoring import SECTION_ORDER, GROUP_TO_SUBJECTS_MAP, VERSION_FILES, read_questions, build_item_matrix, compute_scores
+from storage import DB_PATH, save_response
+from screening import screen_one
+from shared_data import current_snapshot, load_questions
+from forecast import CATALOG_FILES, read_curriculum_table
+
+OPTIONS_MAP = {1: "1(전혀 아니다)", 2: "2(아니다)", 3: "3(보통이다)", 4: "4(그렇다)", 5: "5(매우 그렇다)"}
+DISCLAIMER = "이 검사는 개인의 흥미 유형을 알아보기 위한 간단한 검사이며, 결과는 참고용으로만 활용하시기 바랍니다. 검사자의 태도나 상황에 따라 정확도가 달라질 수 있으므로, 실제 교육과정 선택 시에는 다양한 요소를 함께 고려하시길 권장합니다."
+
+
+def build_bundle_data(df, version):
+    """문항과 채점 행렬을 브라우저에서 쓸 수 있는 JSON 구조로 바꾸는 함수"""
+    model = build_item_matrix(df)
+    questions = []
+    for i, row in enumerate(df.itertuples(index=False)):
+        # [과목 인덱스, 부호, 역문항 여부, 연결 횟수] — scoring.score_matrix와 같은 규칙
+        items = [[int(j), int(model['sign'][i, j]), int(model['reverse'][i, j]), int(model['incidence'][i, j])]
+                 for j in np.flatnonzero(model['incidence'][i])]
+        questions.append({'id': model['q_ids'][i], 'text': getattr(row, '수정내용'), 'section': getattr(row, '카테고리'), 'items': items})
+
+    return {
+        'version': version,
+        'subjects': model['subjects'],
+        'counts': [int(c) for c in model['incidence'].sum(axis=0)],
+        'sections': [s for s in SECTION_ORDER if s in df['카테고리'].unique()],
+        'groupSubjects': GROUP_TO_SUBJECTS_MAP,
+        'subjectToGroup': df.drop_duplicates(subset=['관련교과군']).set_index('관련교과군')['카테고리'].to_dict(),
+        'options': OPTIONS_MAP,
+        'disclaimer': DISCLAIMER,
+        'questions': questions,
+        'curricula': curriculum_tables(),
+    }
+
+
+def curriculum_tables():
+    """결과 화면의 학년도별 선택과목 목록 (스냅샷이 게시되어 있으면 스냅샷 표, 파일이 없으면 missing 표시)"""
+    snapshot = current_snapshot()
+    tables = []
+    for title, file_path in CATALOG_FILES.items():
+        try:
+            if snapshot is not None and file_path in snapshot['catalogs']:
+                df = snapshot['catalogs'][file_path]
+            else:
+                df = read_curriculum_table(file_path)
+        except FileNotFoundError:
+            tables.append({'title': title, 'file': file_path, 'missing': True})
+            continue
+        rows = df.astype(object).where(df.notna(), None).values.tolist()
+        tables.append({'title': title, 'file': file_path, 'columns': [str(c) for c in df.columns], 'rows': rows})
+    return tables
+
+
+def render_bundle(data, upload_url=None):
+    """JSON 데이터를 HTML 템플릿에 넣어 하나의 파일로 만드는 함수"""
+    payload = json.dumps(data, ensure_ascii=False).replace('</', '<\\/')
+    return (HTML_TEMPLATE
+            .replace('__DATA__', payload)
+            .replace('__UPLOAD_URL__', json.dumps(upload_url or '')))
+
+
+def build(file_path, output, version=None, upload_url=None):
+    """문항 파일 하나를 정적 HTML 번들로 내보내는 함수"""
+    if version is None:
+        file_to_version = {f: v for v, f in VERSION_FILES.items()}
+        version = file_to_version.get(os.path.basename(file_path), 'default')
+    df = read_questions(file_path)
+    html = render_bundle(build_bundle_data(df, version), upload_url)
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        f.write(html)
+    return output
+
+
+class UploadHandler(BaseHTTPRequestHandler):
+    """정적 번들의 결과 업로드를 받아 서버 쪽 엔진으로 다시 채점해 저장하는 핸들러"""
+    db_path = DB_PATH
+
+    def _send(self, status, body):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_OPTIONS(self):
+        self._send(204, {})
+
+    def do_POST(self):
+        if self.path.rstrip('/') != '/responses':
+            self._send(404, {'error': 'not found'})
+            return
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            version = body['version']
+            if version not in VERSION_FILES:
+                raise ValueError(f'unknown version: {version}')
+            # answers는 {번호: 응답} 또는 표시 순서대로의 [[번호, 응답], ...]
+            answers = {str(k): v for k, v in dict(body['answers']).items()}
+            section_times = {str(k): float(v) for k, v in (body.get('section_times') or {}).items()}
+            class_name = str(body.get('class_name') or '')[:10]
+            # NaN/Infinity가 섞이면 합계가 NaN이 되어 빠른 응답 판정을 건너뛰므로 유한한 0 이상 값만 받음
+            if not all(math.isfinite(v) and v >= 0 for v in section_times.values()):
+                raise ValueError('section_times must be finite, non-negative seconds')
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            self._send(400, {'error': str(e)})
+            return
+        # 번들과 같은 문항 (스냅샷이 게시되어 있으면 스냅샷 문항)
+        df = load_questions(version)
+        # 모든 문항에 1~5 정수로 답한 응답만 받음 (bool은 int의 하위 클래스이므로 따로 거름)
+        if set(answers) != set(df['번호'].astype(str)):
+            self._send(400, {'error': 'answers must cover every question exactly once'})
+            return
+        if not all(isinstance(v, int) and not isinstance(v, bool) and 1 <= v <= 5 for v in answers.values()):
+            self._send(400, {'error': 'answers must be integers from 1 to 5'})
+            return
+        # 클라이언트 점수는 신뢰하지 않고 파이썬 엔진으로 다시 계산
+        scores = compute_scores(df, answers)
+        flags = screen_one(df, answers, section_times)
+        try:
+            response_id = save_response(version, answers, scores, section_times, flags, class_name=class_name,
+                                        db_path=self.db_path)
+        except sqlite3.Error as e:
+            self._send(500, {'error': f'could not save response: {e}'})
+            return
+        self._send(201, {'id': response_id})
+
+
+def check_with_node(file_path, sessions=3000, seed=0):
+    """번들의 scoreAnswers/formatScore를 node로 실행해 compute_scores 및 f"{x:.2f}"와 비교하는 함수
+
+    (비교한 세션 수, 다른 결과 목록)을 돌려주고, node가 없으면 None을 돌려줍니다.
+    """
+    node = shutil.which('node')
+    if node is None:
+        return None
+    df = read_questions(file_path)
+    script = re.search(r'<script>(.*)</script>', render_bundle(build_bundle_data(df, 'default')), re.S).group(1)
+    rng = np.random.default_rng(seed)
+    q_ids = df['번호'].astype(str).tolist()
+    cases = [dict(zip(q_ids, rng.integers(1, 6, len(q_ids)).tolist())) for _ in range(sessions)]
+    # 반올림 경계(홀수/8)와 그 주변 값
+    ties = [k / 8 for k in range(8, 41)] + [2.675, 1.005, 1 / 3, 2 / 3]
+    runner = script + """
+const input = JSON.parse(require('fs').readFileSync(0, 'utf8'));
+console.log(JSON.stringify({
+  scores: input.cases.map(c => Object.entries(scoreAnswers(c)).map(([k, v]) => [k, v, formatScore(v)])),
+  ties: input.ties.map(formatScore),
+}));"""
+    out = json.loads(subprocess.run([node, '-e', runner], input=json.dumps({'cases': cases, 'ties': ties}),
+                                    capture_output=True, text=True, check=True).stdout)
+    model = build_item_matrix(df)
+    mismatches = []
+    for case, js in zip(cases, out['scores']):
+        expected = [[k, v, f"{v:.2f}"] for k, v in compute_scores(df, case, model=model).items()]
+        if expected != js:
+            mismatches.append({'answers': case, 'python': expected, 'js': js})
+    mismatches += [{'value': x, 'python': f"{x:.2f}", 'js': js} for x, js in zip(ties, out['ties']) if f"{x:.2f}" != js]
+    return len(cases), mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="설문을 정적 HTML/JS 번들로 내보냅니다.")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = sub.add_parser('build', help="정적 번들 생성")
+    build_parser.add_argument('questions', help="문항 CSV 파일 (예: default_data.csv)")
+    build_parser.add_argument('-o', '--output', default='dist/index.html')
+    build_parser.add_argument('--version', choices=sorted(VERSION_FILES), help="저장 시 사용할 검사 버전 (기본: 파일 이름으로 판단)")
+    build_parser.add_argument('--upload-url', help="결과를 POST할 주소 (생략하면 업로드하지 않음)")
+
+    serve_parser = sub.add_parser('serve', help="결과 업로드 수신 서버 실행")
+    serve_parser.add_argument('--host', default='0.0.0.0')
+    serve_parser.add_argument('--port', type=int, default=8502)
+    serve_parser.add_argument('--db', default=DB_PATH)
+
+    check_parser = sub.add_parser('check', help="번들 채점이 compute_scores와 같은지 node로 확인")
+    check_parser.add_argument('questions', help="문항 CSV 파일")
+    check_parser.add_argument('--sessions', type=int, default=3000)
+    check_parser.add_argument('--seed', type=int, default=0)
+
+    args = parser.parse_args()
+    if args.command == 'build':
+        print(build(args.questions, args.output, args.version, args.upload_url))
+    elif args.command == 'check':
+        result = check_with_node(args.questions, args.sessions, args.seed)
+        if result is None:
+            print("node가 없어 확인을 건너뜁니다.")
+            return
+        count, mismatches = result
+        for mismatch in mismatches[:5]:
+            print(json.dumps(mismatch, ensure_ascii=False))
+        print(f"세션 {count}개 비교, 다른 결과 {len(mismatches)}개")
+        raise SystemExit(1 if mismatches else 0)
+    else:
+        UploadHandler.db_path = args.db
+        ThreadingHTTPServer((args.host, args.port), UploadHandler).serve_forever()
+
+
+HTML_TEMPLATE = r"""<!DOCTYPE html>
+<html lang="ko">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>과목 유형 검사</title>
+<style>
+body { font-family: sans-serif; max-width: 960px; margin: 0 auto; padding: 1rem; }
+.question { margin: 1rem 0; }
+.question label { margin-right: 1rem; white-space: nowrap; }
+.info { background: #e8f0fe; padding: .75rem; border-radius: .5rem; }
+.warning { background: #fff4e5; padding: .75rem; border-radius: .5rem; }
+.metrics { display: grid; grid-template-columns: repeat(4, 1fr); gap: .5rem; }
+.metric .value { font-size: 1.6rem; }
+.bar-row { display: flex; align-items: center; margin: .2rem 0; }
+.bar-row .name { width: 6rem; }
+.bar-row .bar { background: #636efa; height: 1.2rem; margin-right: .5rem; }
+button { padding: .5rem 1rem; font-size: 1rem; }
+details { margin: .5rem 0; }
+table { width: 100%; border-collapse: collapse; }
+th, td { border: 1px solid #ddd; padding: .3rem .5rem; text-align: left; }
+.caption { color: #777; font-size: .85rem; }
+</style>
+</head>
+<body>
+<h1>📚 서울고등학교 선택과목 유형검사</h1>
+<p><label>학년-반 (선택, 예: 2-3) <input id="class-name" maxlength="10"></label></p>
+<div id="app"></div>
+<script>
+"use strict";
+const DATA = __DATA__;
+const UPLOAD_URL = __UPLOAD_URL__;
+
+// scoring.score_matrix와 동일: 합계는 정수, 나눗셈만 부동소수점이므로 파이썬과 비트 단위로 같다
+function scoreAnswers(answers) {
+  const totals = DATA.subjects.map(() => 0);
+  for (const q of DATA.questions) {
+    const answer = answers[q.id];
+    if (answer === undefined) continue;
+    for (const [j, sign, reverse] of q.items) totals[j] += sign * answer + 6 * reverse;
+  }
+  const scores = {};
+  DATA.subjects.forEach((subject, j) => {
+    if (DATA.counts[j] > 0) scores[subject] = totals[j] / DATA.counts[j];
+  });
+  return scores;
+}
+
+// 파이썬 f"{x:.2f}"와 같은 결과. toFixed는 정확히 반올림 경계인 값(홀수/8)만 올림하므로
+// 그 경우에만 파이썬처럼 짝수 쪽을 고른다
+function formatScore(x) {
+  const eighths = x * 8;
+  if (Number.isInteger(eighths) && eighths % 2 !== 0) {
+    const k = Math.floor(x * 100);
+    return ((k % 2 === 0 ? k : k + 1) / 100).toFixed(2);
+  }
+  return x.toFixed(2);
+}
+
+function shuffle(items) {
+  const a = items.slice();
+  for (let i = a.length - 1; i > 0; i--) {
+    const j = Math.floor(Math.random() * (i + 1));
+    [a[i], a[j]] = [a[j], a[i]];
+  }
+  return a;
+}
+
+function el(tag, attrs, ...children) {
+  const node = document.createElement(tag);
+  Object.assign(node, attrs || {});
+  for (const child of children) node.append(child);
+  return node;
+}
+
+// answerLog는 화면에 표시된 순서대로 [문항 번호, 응답]을 기록 (숫자 키 객체는 순서가 바뀌므로)
+const state = { section: 0, responses: {}, answerLog: [], sectionTimes: {}, startedAt: null };
+const app = typeof document !== "undefined" ? document.getElementById("app") : null;
+
+function renderSection() {
+  app.replaceChildren();
+  const total = DATA.questions.length;
+  const answered = Object.keys(state.responses).length;
+  app.append(el("p", { textContent: `진행률: ${answered} / ${total} 문항` }), el("progress", { value: answered, max: total }));
+
+  const name = DATA.sections[state.section];
+  const questions = shuffle(DATA.questions.filter(q => q.section === name));
+  state.startedAt = Date.now();
+  app.append(el("h2", { textContent: `섹션 ${state.section + 1}: ${name}` }));
+  const subjects = DATA.groupSubjects[name] || [];
+  if (subjects.length) app.append(el("p", { className: "info", textContent: `해당 교과군에서는 ${subjects.join(" , ")} 과목들의 선호도를 측정합니다.` }));
+
+  const form = el("form");
+  for (const q of questions) {
+    const div = el("div", { className: "question" }, el("p", {}, el("strong", { textContent: q.text })));
+    for (const value of [1, 2, 3, 4, 5]) {
+      div.append(el("label", {}, el("input", { type: "radio", name: `q_${q.id}`, value }), " " + DATA.options[value]));
+    }
+    form.append(div);
+  }
+  const message = el("p", { className: "warning", hidden: true, textContent: "모든 문항에 답변해주세요!" });
+  const last = state.section === DATA.sections.length - 1;
+  form.append(message, el("button", { type: "submit", textContent: last ? "결과 분석하기" : "다음 섹션으로" }));
+  form.addEventListener("submit", event => {
+    event.preventDefault();
+    const checked = questions.map(q => form.querySelector(`input[name="q_${q.id}"]:checked`));
+    if (checked.some(c => c === null)) { message.hidden = false; return; }
+    questions.forEach((q, i) => {
+      state.responses[q.id] = Number(checked[i].value);
+      state.answerLog.push([q.id, state.responses[q.id]]);
+    });
+    state.sectionTimes[name] = (Date.now() - state.startedAt) / 1000;
+    state.section += 1;
+    window.scrollTo(0, 0);
+    if (state.section < DATA.sections.length) renderSection(); else renderResults();
+  });
+  app.append(form);
+}
+
+function renderResults() {
+  app.replaceChildren();
+  const answers = Object.values(state.responses);
+  if (new Set(answers).size === 1) {
+    app.append(el("p", { className: "warning", textContent: `모든 문항에 '${answers[0]}'번으로만 응답하셨습니다. 보다 정확한 결과를 위해 다양한 선택을 해보시길 권장합니다.` }));
+  }
+  const scores = scoreAnswers(state.responses);
+  // Array.prototype.sort는 안정 정렬이므로 동점 순서가 파이썬 sorted(reverse=True)와 같다
+  const sorted = Object.entries(scores).sort((a, b) => b[1] - a[1]);
+  app.append(el("h2", { textContent: "📈 최종 분석 결과" }));
+
+  if (sorted.length) {
+    app.append(el("h3", { textContent: "💡 나의 상위 선호 과목 (교과군별)" }));
+    const top8 = sorted.slice(0, 8).map(([subject]) => subject);
+    for (const group of Object.keys(DATA.groupSubjects)) {
+      const groupSubjects = top8.filter(s => DATA.subjectToGroup[s] === group);
+      if (!groupSubjects.length) continue;
+      const grid = el("div", { className: "metrics" });
+      for (const s of groupSubjects) {
+        grid.append(el("div", { className: "metric" }, el("div", { textContent: s }), el("div", { className: "value", textContent: `${formatScore(scores[s])}점` })));
+      }
+      app.append(el("p", {}, el("strong", { textContent: `▌ ${group}` })), grid);
+    }
+    app.append(el("h3", { textContent: "과목별 선호도 점수 (평균 점수)" }));
+    for (const subject of DATA.subjects) {
+      const value = scores[subject] || 0;
+      app.append(el("div", { className: "bar-row" }, el("span", { className: "name", textContent: subject }),
+        el("span", { className: "bar", style: `width:${value * 15}%` }), el("span", { textContent: formatScore(value) })));
+    }
+  } else {
+    app.append(el("p", { className: "warning", textContent: "분석 결과가 없습니다." }));
+  }
+  app.append(el("hr"), el("p", { className: "info", textContent: DATA.disclaimer }));
+
+  app.append(el("h3", { textContent: "추가정보" }));
+  const guide = el("details", {}, el("summary", { textContent: "교과군별 과목 유형 안내" }));
+  for (const [group, subjects] of Object.entries(DATA.groupSubjects)) {
+    guide.append(el("p", {}, el("strong", { textContent: group }), `: ${subjects.join(", ")}`));
+  }
+  app.append(guide);
+  app.append(el("h3", { textContent: "학년도별 선택과목 목록" }));
+  for (const table of DATA.curricula) renderCurriculum(table);
+  app.append(el("p", { className: "caption", textContent: "Made by : 서울고등학교 선택과목 유형검사 개발 수업량 유연화 팀 😊" }));
+
+  if (UPLOAD_URL) {
+    const status = el("p", { textContent: "결과를 전송하는 중입니다..." });
+    app.append(status);
+    fetch(UPLOAD_URL, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({
+        version: DATA.version,
+        class_name: document.getElementById("class-name").value.trim(),
+        answers: state.answerLog,
+        section_times: state.sectionTimes,
+      }),
+    }).then(r => { status.textContent = r.ok ? "결과가 전송되었습니다." : "결과 전송에 실패했습니다."; })
+      .catch(() => { status.textContent = "결과 전송에 실패했습니다."; });
+  }
+  app.append(el("button", { textContent: "검사 다시하기", onclick: () => location.reload() }));
+}
+
+// main.py의 process_and_display_table과 같이 교과군마다 학년 + 해당 과목 열만 접어서 보여줌
+function renderCurriculum(table) {
+  if (table.missing) {
+    app.append(el("p", { className: "warning", textContent: `\`${table.file}\` 파일을 찾을 수 없습니다.` }));
+    return;
+  }
+  app.append(el("p", {}, el("strong", { textContent: table.title })));
+  for (const [group, subjects] of Object.entries(DATA.groupSubjects)) {
+    const cols = [0].concat(table.columns.map((c, i) => i).filter(i => i > 0 && subjects.includes(table.columns[i])));
+    const rows = table.rows.map(r => cols.map(i => r[i])).filter(r => r.some(v => v !== null));
+    if (!rows.length) continue;
+    const head = el("tr", {}, ...cols.map(i => el("th", { textContent: table.columns[i] })));
+    const body = rows.map(r => el("tr", {}, ...r.map(v => el("td", { textContent: v === null ? "" : String(v) }))));
+    app.append(el("details", {}, el("summary", { textContent: group }), el("table", {}, head, ...body)));
+  }
+}
+
+if (app) renderSection();
+</script>
+</body>
+</html>
+"""
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""저장된 응답과 과목별 점수를 XLSX 또는 Parquet으로 내보내는 스크립트
+
+응답은 storage.iter_responses로 묶음 단위로 읽어 바로 파일에 쓰므로 학생 수와 관계없이 메모리 사용량이 일정합니다.
+
+사용법:
+    python export.py -o 결과.xlsx [--class 2-3] [--version default] [--since 2025-03-01] [--until 2025-03-31]
+    python export.py -o 결과.parquet --format parquet --exclude-suspect
+"""
+import argparse
+import os
+from datetime import date, timedelta
+
+from openpyxl import Workbook
+
+from scoring import SUBJECT_ORDER, VERSION_FILES
+from storage import DB_PATH, iter_responses
+
+# 내보낼 열: (iter_responses 키, 표 머리글)
+COLUMNS = [
+    ('id', '응답 번호'),
+    ('submitted_at', '제출 시각'),
+    ('class_name', '반'),
+    ('version', '검사 버전'),
+    ('adaptive', '적응형'),
+    ('suspect', '불성실 의심'),
+    ('flags', '의심 항목'),
+] + [(subject, subject) for subject in SUBJECT_ORDER] + [
+    ('answers', '응답(JSON)'),
+]
+ROW_GROUP_SIZE = 1000
+
+
+def date_range(since=None, until=None):
+    """'YYYY-MM-DD' 기간을 iter_responses의 since/until로 바꾸는 함수 (until 날짜 포함, 잘못된 날짜면 ValueError)"""
+    # 제출 시각과 문자열로 비교하므로 '2026-9-1' 같은 입력이 그대로 넘어가지 않도록 날짜로 읽어 다시 씀
+    since = date.fromisoformat(since).isoformat() if since else None
+    until_exclusive = (date.fromisoformat(until) + timedelta(days=1)).isoformat() if until else None
+    return since, until_exclusive
+
+
+def export_xlsx(rows, output):
+    """openpyxl 쓰기 전용 모드로 한 행씩 XLSX에 쓰는 함수"""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("응답")
+    ws.append([label for _, label in COLUMNS])
+    count = 0
+    for row in rows:
+        ws.append([row[key] for key, _ in COLUMNS])
+        count += 1
+    wb.save(output)
+    return count
+
+
+def export_parquet(rows, output, row_group_size=ROW_GROUP_SIZE):
+    """row_group_size행씩 모아 Parquet 행 그룹으로 쓰는 함수 (pyarrow 필요)"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet으로 내보내려면 pyarrow가 필요합니다. (pip install pyarrow)")
+
+    types = {'id': pa.int64(), 'adaptive': pa.int8(), 'suspect': pa.int8()}
+    types.update({subject: pa.float64() for subject in SUBJECT_ORDER})
+    schema = pa.schema([(label, types.get(key, pa.string())) for key, label in COLUMNS])
+
+    count = 0
+    with pq.ParquetWriter(output, schema) as writer:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= row_group_size:
+                writer.write_table(_to_table(pa, schema, batch), row_group_size=row_group_size)
+                count += len(batch)
+                batch = []
+        if batch or count == 0:
+            writer.write_table(_to_table(pa, schema, batch), row_group_size=row_group_size)
+            count += len(batch)
+    return count
+
+
+def _to_table(pa, schema, batch):
+    return pa.table({label: [row[key] for row in batch] for key, label in COLUMNS}, schema=schema)
+
+
+def export(output, fmt=None, class_name=None, version=None, since=None, until=None,
+           include_suspect=True, db_path=DB_PATH):
+    """조건에 맞는 응답을 파일로 내보내고 내보낸 행 수를 돌려주는 함수 (fmt를 생략하면 확장자로 판단)"""
+    fmt = fmt or ('parquet' if output.endswith('.parquet') else 'xlsx')
+    since, until = date_range(since, until)
+    rows = iter_responses(class_name, version, since, until, include_suspect, db_path=db_path)
+    if fmt == 'parquet':
+        return export_parquet(rows, output)
+    return export_xlsx(rows, output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="저장된 응답과 과목별 점수를 내보냅니다.")
+    parser.add_argument('-o', '--output', required=True, help="출력 파일 (.xlsx 또는 .parquet)")
+    parser.add_argument('--format', choices=['xlsx', 'parquet'], help="기본: 출력 파일 확장자로 판단")
+    parser.add_argument('--class', dest='class_name', help="반 (예: 2-3)")
+    parser.add_argument('--version', choices=sorted(VERSION_FILES))
+    parser.add_argument('--since', help="시작 날짜 YYYY-MM-DD (포함)")
+    parser.add_argument('--until', help="끝 날짜 YYYY-MM-DD (포함)")
+    parser.add_argument('--exclude-suspect', action='store_true', help="불성실 의심 응답 제외")
+    parser.add_argument('--db', default=DB_PATH)
+    args = parser.parse_args()
+    for name in ('since', 'until'):
+        value = getattr(args, name)
+        try:
+            date_range(**{name: value})
+        except ValueError:
+            parser.error(f"--{name}: 날짜는 YYYY-MM-DD 형식이어야 합니다 ({value!r})")
+
+    output_dir = os.path.dirname(os.path.abspath(args.output))
+    os.makedirs(output_dir, exist_ok=True)
+    count = export(args.output, args.format, args.class_name, args.version, args.since, args.until,
+                   not args.exclude_suspect, args.db)
+    print(f"{count}건을 {args.output}에 저장했습니다.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+from scoring import SUBJECT_ORDER, top_subjects_mask
+
+# 학년도별 선택과목 목록 파일
+CATALOG_FILES = {'2025년 입학생부터': '2025.csv', '2024년 입학생까지': '2024.csv'}
+
+
+def read_curriculum_table(file_path):
+    """학년도별 선택과목 CSV를 결과 페이지에 보여주는 표 형태(학년 + 과목 열)로 읽는 함수"""
+    df = pd.read_csv(file_path, header=None)
+    df.columns = df.iloc[2].tolist()
+    df = df.iloc[3:].reset_index(drop=True)
+    df.columns.name = None
+    # '학년' 열 이름을 명시적으로 설정
+    return df.rename(columns={df.columns[0]: '학년'})
+
+
+def read_catalog(file_path=None, table=None):
+    """학년도별 선택과목 표를 (학년, 과목, 강좌) 목록으로 펼치는 함수 (이미 읽은 표를 table로 넘길 수 있음)"""
+    df = (table if table is not None else read_curriculum_table(file_path)).copy()
+    # 학년은 첫 행에만 적혀 있으므로 아래 행으로 채움
+    df['학년'] = df['학년'].ffill()
+
+    subject_cols = [col for col in df.columns if col in SUBJECT_ORDER]
+    catalog = df.melt(id_vars='학년', value_vars=subject_cols, var_name='과목', value_name='강좌').dropna(subset=['강좌'])
+    catalog['강좌'] = catalog['강좌'].str.strip()
+    return catalog[catalog['강좌'] != ''].reset_index(drop=True)
+
+
+def forecast_enrollment(scores, catalog, top_n=8, cohort_size=None, section_size=25):
+    """상위 N개 선호 과목을 집계해 강좌별 예상 수강 인원과 분반 수를 계산하는 함수
+
+    scores: (응답자 × 과목) 점수표, catalog: read_catalog 결과
+    한 과목에 같은 학년 강좌가 여러 개면 선호 학생이 강좌들에 고르게 나뉜다고 가정합니다.
+    cohort_size를 주면 응답자 수 대비 전체 학생 수 비율로 인원을 보정합니다.
+    """
+    demand = top_subjects_mask(scores, top_n).sum()
+    scale = cohort_size / len(scores) if cohort_size and len(scores) else 1.0
+
+    result = catalog.copy()
+    courses_per_subject = result.groupby(['학년', '과목'])['강좌'].transform('size')
+    result['선호 학생 수'] = result['과목'].map(demand).fillna(0).astype(int)
+    expected = result['선호 학생 수'] * scale / courses_per_subject
+    result['예상 수강 인원'] = np.round(expected).astype(int)
+    result['예상 분반 수'] = np.ceil(expected / section_size).astype(int)
+    return result
+
+
+def summarize_by_grade(result):
+    """강좌별 예측 결과를 학년 × 과목 합계로 요약하는 함수"""
+    return result.groupby(['학년', '과목'], sort=False)[['예상 수강 인원', '예상 분반 수']].sum().reset_index()
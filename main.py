@@ -2,6 +2,19 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import random
+import json
+import os
+import sqlite3
+import tempfile
+import time
+
+from scoring import SUBJECT_ORDER, SECTION_ORDER, GROUP_TO_SUBJECTS_MAP, VERSION_FILES, compute_scores, build_item_matrix
+from storage import save_response, data_version, load_scores, load_answers, list_classes
+from screening import screen_one, rescreen_all
+from forecast import CATALOG_FILES, read_curriculum_table, read_catalog, forecast_enrollment, summarize_by_grade
+from shared_data import current_snapshot, publish, load_questions, questions_version
+import export
+import adaptive
 
 # 페이지 기본 설정
 st.set_page_config(page_title="과목 유형 검사", page_icon="📚", layout="wide")
@@ -16,43 +29,31 @@ st.markdown(
     unsafe_allow_html=True
 )
 
-@st.cache_data
-def load_data(file_path):
-    """CSV 파일을 로드하고 데이터를 정리하는 함수"""
+def get_questions(version_key):
+    """공유 스냅샷이 게시되어 있으면 그 문항을, 없으면 CSV를 읽은 문항을 돌려주는 함수"""
     try:
-        df = pd.read_csv(file_path, dtype={'번호': str})
-        df.columns = df.columns.str.strip()
-        
-        for col in ['관련교과군', '관련교과군2', '관련교과군3']:
-            if col in df.columns:
-                df[col] = df[col].apply(lambda x: x.strip() if isinstance(x, str) else x)
-
-        name_map = {'생명': '생명과학', '지구': '지구과학', '일사': '일반사회'}
-        for col in ['관련교과군', '관련교과군2', '관련교과군3']:
-            if col in df.columns:
-                df[col] = df[col].replace(name_map)
-                
-        return df
+        return load_questions(version_key)
     except Exception as e:
         st.error(f"데이터 파일 로드 중 오류: {e}")
         return None
 
-# --- 데이터 상수 정의 ---
-SUBJECT_ORDER = ['국어', '수학', '영어', '독일어', '중국어', '일본어', '물리', '화학', '생명과학', '지구과학', '일반사회', '역사', '윤리', '지리']
-SECTION_ORDER = ['기초교과군', '제2외국어군', '과학군', '사회군']
-# 1. 교과군별 과목 정보를 딕셔너리로 정의
-GROUP_TO_SUBJECTS_MAP = {
-    '기초교과군': ['국어', '수학', '영어'],
-    '제2외국어군': ['독일어', '중국어', '일본어'],
-    '과학군': ['물리', '화학', '생명과학', '지구과학'],
-    '사회군': ['일반사회', '역사', '윤리', '지리']
-}
+def get_model(df):
+    """문항 데이터에 맞는 채점 행렬 (스냅샷 문항이면 메모리 매핑된 행렬을 그대로 사용)"""
+    snapshot = current_snapshot()
+    if snapshot is not None:
+        for version_key, questions in snapshot['questions'].items():
+            if questions is df:
+                return snapshot['models'][version_key]
+    return build_item_matrix(df)
 
 # 세션 상태 초기화
 if 'dev_authenticated' not in st.session_state:
     st.session_state.dev_authenticated = False
 if 'show_dev_results' not in st.session_state:
     st.session_state.show_dev_results = False
+# 개발자 도구 화면: None, 'forecast', 'adaptive', 'export'
+if 'dev_view' not in st.session_state:
+    st.session_state.dev_view = None
 
 # 개발자 모드 기능
 if 'dev_authenticated' not in st.session_state:
@@ -73,10 +74,28 @@ if st.query_params.get("dev") == "true":
 if st.session_state.dev_authenticated:
     if st.button("결과 페이지 바로보기 (기본 버전)"):
         st.session_state.show_dev_results = True
+        st.session_state.dev_view = None
         st.rerun()
+    for label, view in [("수강 수요 예측 보기", 'forecast'), ("적응형 모드 편차 분석", 'adaptive'), ("응답 내보내기 (XLSX/Parquet)", 'export')]:
+        if st.button(label):
+            st.session_state.dev_view = view
+            st.session_state.show_dev_results = False
+            st.rerun()
+    if st.button("저장된 응답 품질 재검사"):
+        try:
+            n_suspect, n_total = rescreen_all()
+            st.success(f"응답 {n_total}건 중 {n_suspect}건이 의심 응답으로 표시되어 집계에서 제외됩니다.")
+        except sqlite3.Error as e:
+            st.error(f"재검사 중 오류 발생: {e}")
+    if st.button("공유 데이터 스냅샷 게시"):
+        try:
+            st.success(f"스냅샷 {publish()} 을(를) 게시했습니다. 모든 서버 프로세스가 다음 실행부터 이 버전을 사용합니다.")
+        except (OSError, sqlite3.Error) as e:
+            st.error(f"스냅샷 게시 중 오류 발생: {e}")
     if st.button("로그아웃"):
         st.session_state.dev_authenticated = False
         st.session_state.show_dev_results = False
+        st.session_state.dev_view = None
         st.rerun()
 # UI 시작
 with st.container():
@@ -128,7 +147,12 @@ def display_survey(df):
     section_index = st.session_state.current_section
     if section_index < len(section_list):
         current_section_name = section_list[section_index]
-        questions_df = df[df['카테고리'] == current_section_name].sample(frac=1).reset_index(drop=True)
+        # 섹션마다 한 번만 섞어 두어, 다시 실행되어도 학생이 본 순서대로 응답이 저장되도록 함
+        order_key = f"order_{section_index}"
+        if order_key not in st.session_state:
+            st.session_state[order_key] = df.loc[df['카테고리'] == current_section_name, '번호'].astype(str).sample(frac=1).tolist()
+            st.session_state.setdefault('section_started', {})[current_section_name] = time.time()
+        questions_df = df.set_index(df['번호'].astype(str)).loc[st.session_state[order_key]].reset_index(drop=True)
         st.subheader(f"섹션 {section_index + 1}: {current_section_name}")
         
         # --- 1. 섹션 시작 전 과목 안내 추가 ---
@@ -162,12 +186,75 @@ def display_survey(df):
                         st.session_state.responses = {}
                     for _, row in questions_df.iterrows():
                         st.session_state.responses[str(row['번호'])] = st.session_state[f"q_{row['번호']}"]
+                    started = st.session_state.get('section_started', {}).get(current_section_name)
+                    if started is not None:
+                        st.session_state.setdefault('section_times', {})[current_section_name] = round(time.time() - started, 1)
                     st.session_state.current_section += 1
                     st.rerun()
     else:
         st.session_state.show_results = True
         st.rerun()
 
+def display_adaptive_survey(df):
+    """적응형 모드: 첫 화면에서 섹션마다 과목별 최소 문항을 묻고, 순위가 불안정한 섹션만 추가 문항을 최대 MAX_FOLLOW_UPS번 더 물음"""
+    version = st.session_state.get('version')
+    sections = adaptive.section_items(df)
+    model = get_model(df)
+
+    if 'adaptive_round' not in st.session_state:
+        st.session_state.adaptive_round = 0
+    if 'responses' not in st.session_state:
+        st.session_state.responses = {}
+
+    total_questions = len(df)
+    answered_questions = len(st.session_state.responses)
+    st.progress(answered_questions / total_questions, text=f"진행률: {answered_questions} / 최대 {total_questions} 문항 (적응형)")
+
+    # 단계별 묶음은 한 번만 정해 두어, 다시 실행되어도 같은 문항이 같은 순서로 보이도록 함
+    round_index = st.session_state.adaptive_round
+    plan_key = f"plan_{round_index}"
+    if plan_key not in st.session_state:
+        st.session_state[plan_key] = adaptive.plan_round(model, sections, st.session_state.responses, round_index)
+        st.session_state.setdefault('section_started', {})[plan_key] = time.time()
+    plan = st.session_state[plan_key]
+    if not plan:
+        st.session_state.show_results = True
+        st.rerun()
+
+    options_map = {1: "1(전혀 아니다)", 2: "2(아니다)", 3: "3(보통이다)", 4: "4(그렇다)", 5: "5(매우 그렇다)"}
+    shown_ids = [q for block in plan.values() for q in block]
+    section_list = list(sections.keys())
+
+    with st.form(key=f"form_{version}_adaptive_{round_index}"):
+        if round_index > 0:
+            st.info("응답을 바탕으로 순위가 아직 가까운 과목의 문항을 조금 더 묻습니다.")
+        for section_name, block in plan.items():
+            st.subheader(f"섹션 {section_list.index(section_name) + 1}: {section_name}")
+            subjects_in_group = adaptive.section_subjects(model, section_name, sections[section_name])
+            if round_index == 0 and subjects_in_group:
+                st.info(f"해당 교과군에서는 **{' , '.join(subjects_in_group)}** 과목들의 선호도를 측정합니다.")
+            questions_df = df.set_index(df['번호'].astype(str)).loc[block].reset_index(drop=True)
+            for _, row in questions_df.iterrows():
+                st.markdown(f"**{row['수정내용']}**")
+                st.radio("선택", [1, 2, 3, 4, 5], key=f"q_{row['번호']}",
+                         format_func=lambda x: options_map[x],
+                         horizontal=True,
+                         label_visibility="collapsed",
+                         index=None)
+
+        if st.form_submit_button("다음"):
+            if any(st.session_state.get(f"q_{q}") is None for q in shown_ids):
+                st.warning("모든 문항에 답변해주세요!")
+            else:
+                for q in shown_ids:
+                    st.session_state.responses[q] = st.session_state[f"q_{q}"]
+                # 적응형 모드는 한 화면에 여러 섹션이 섞이므로 소요 시간은 단계별로 기록
+                started = st.session_state.get('section_started', {}).get(plan_key)
+                if started is not None:
+                    st.session_state.setdefault('section_times', {})[f"적응형 {round_index + 1}단계"] = round(time.time() - started, 1)
+                st.session_state.adaptive_round += 1
+                st.rerun()
+
 def display_results(df, is_dev_mode=False):
     responses = st.session_state.get('responses', {})
     if not is_dev_mode:
@@ -176,41 +263,31 @@ def display_results(df, is_dev_mode=False):
             st.warning(f"모든 문항에 '{all_answers[0]}'번으로만 응답하셨습니다. 보다 정확한 결과를 위해 다양한 선택을 해보시길 권장합니다.")
 
     with st.spinner('결과를 분석하는 중입니다...'):
-        question_counts = {subject: 0 for subject in SUBJECT_ORDER}
-        for _, row in df.iterrows():
-            for i in range(1, 4):
-                subject_col = f'관련교과군{i}' if i > 1 else '관련교과군'
-                if subject_col in row and pd.notna(row[subject_col]):
-                    subject = row[subject_col]
-                    if subject in question_counts:
-                        question_counts[subject] += 1
-        
-        total_scores = {subject: 0 for subject in SUBJECT_ORDER}
-        df_results = df.astype({'번호': str})
-        for q_id, answer in responses.items():
-            q_data_rows = df_results.loc[df_results['번호'] == q_id]
-            if q_data_rows.empty: continue
-            q_data = q_data_rows.iloc[0]
-            for i in range(1, 4):
-                subject_col = f'관련교과군{i}' if i > 1 else '관련교과군'
-                scale_col = f'척도{i}' if i > 1 else '척도'
-                if subject_col in q_data and pd.notna(q_data[subject_col]):
-                    subject = q_data[subject_col]
-                    scale = q_data[scale_col]
-                    score = (6 - answer) if scale == '역' else answer
-                    if subject in total_scores:
-                        total_scores[subject] += score
-
-        normalized_scores = {}
-        for subject, total_score in total_scores.items():
-            if question_counts.get(subject, 0) > 0:
-                normalized_scores[subject] = total_score / question_counts[subject]
-        
+        # 적응형 모드는 응답한 문항만으로 평균을 냄
+        is_adaptive = st.session_state.get('adaptive', False) and not is_dev_mode
+        normalized_scores = compute_scores(df, responses, answered_only=is_adaptive, model=get_model(df))
+
         sorted_scores_dict = dict(sorted(normalized_scores.items(), key=lambda item: item[1], reverse=True))
 
+    # 수강 수요 예측을 위해 완료된 응답을 한 번만 저장
+    if not is_dev_mode and not st.session_state.get('response_saved', False):
+        try:
+            section_times = st.session_state.get('section_times')
+            flags = screen_one(df, responses, section_times)
+            save_response(st.session_state.get('version_key', 'default'), responses, normalized_scores, section_times, flags, is_adaptive,
+                          st.session_state.get('class_name', ''))
+            st.session_state.response_saved = True
+        except sqlite3.Error as e:
+            st.error(f"응답 저장 중 오류: {e}")
+
     st.balloons()
     st.header("📈 최종 분석 결과")
 
+    if is_adaptive:
+        estimates = adaptive.subject_estimates(get_model(df), responses, list(normalized_scores))
+        st.info(f"적응형 모드로 {len(responses)} / {len(df)} 문항에 응답했습니다. "
+                f"전체 문항에 응답했을 때와 비교한 과목별 점수의 예상 오차는 평균 ±{estimates['se'].mean():.2f}점(표준오차)입니다.")
+
     if sorted_scores_dict:
         st.subheader("💡 나의 상위 선호 과목 (교과군별)")
         subject_to_group_map = df.drop_duplicates(subset=['관련교과군']).set_index('관련교과군')['카테고리'].to_dict()
@@ -248,13 +325,11 @@ def display_results(df, is_dev_mode=False):
 
     def process_and_display_table(file_path, year_text):
         try:
-            df = pd.read_csv(file_path, header=None)
-            df.columns = df.iloc[2].tolist()
-            df = df.iloc[3:].reset_index(drop=True)
-            df.columns.name = None
-
-            # '학년' 열 이름을 명시적으로 설정
-            df = df.rename(columns={df.columns[0]: '학년'})
+            snapshot = current_snapshot()
+            if snapshot is not None and file_path in snapshot['catalogs']:
+                df = snapshot['catalogs'][file_path]
+            else:
+                df = read_curriculum_table(file_path)
 
             st.markdown(f"**{year_text}**")
             
@@ -291,6 +366,110 @@ def display_results(df, is_dev_mode=False):
         st.session_state.clear()
         st.rerun()
 
+@st.cache_data
+def cached_forecast(catalog_path, top_n, cohort_size, section_size, data_version):
+    """수강 수요 예측 결과를 캐시하는 함수 (data_version이 바뀌면 새 응답과 의심 표시를 반영해 다시 계산)"""
+    snapshot = current_snapshot()
+    # 게시된 스냅샷이 현재 응답과 의심 표시까지 담고 있으면 DB를 다시 읽지 않고 공유 집계를 사용
+    if snapshot is not None and snapshot['data_version'] == data_version:
+        scores = snapshot['cohort_scores']
+    else:
+        scores = load_scores()
+    if snapshot is not None and catalog_path in snapshot['catalogs']:
+        catalog = read_catalog(table=snapshot['catalogs'][catalog_path])
+    else:
+        catalog = read_catalog(catalog_path)
+    return len(scores), forecast_enrollment(scores, catalog, top_n, cohort_size, section_size)
+
+def display_forecast():
+    st.header("📊 수강 수요 예측")
+    catalog_label = st.selectbox("교육과정", list(CATALOG_FILES.keys()))
+    cols = st.columns(3)
+    top_n = cols[0].number_input("상위 선호 과목 수 (N)", min_value=1, max_value=len(SUBJECT_ORDER), value=8)
+    cohort_size = cols[1].number_input("학년 전체 학생 수 (0이면 응답자 수 그대로)", min_value=0, value=0)
+    section_size = cols[2].number_input("분반당 학생 수", min_value=1, value=25)
+
+    try:
+        n_responses, result = cached_forecast(CATALOG_FILES[catalog_label], top_n, cohort_size, section_size, data_version())
+    except (sqlite3.Error, FileNotFoundError) as e:
+        st.error(f"수요 예측 중 오류 발생: {e}")
+        return
+    if n_responses == 0:
+        st.warning("저장된 응답이 없습니다.")
+        return
+
+    st.caption(f"응답 {n_responses}건 기준 (불성실 응답으로 표시된 응답은 제외)")
+    st.subheader("학년별 과목 합계")
+    st.dataframe(summarize_by_grade(result), hide_index=True)
+    st.subheader("강좌별 예상 수강 인원")
+    st.dataframe(result, hide_index=True)
+
+@st.cache_data
+def cached_adaptive_report(version_key, data_version, questions_version):
+    """저장된 전체 문항 응답으로 적응형 모드를 재현한 결과를 캐시하는 함수 (응답이나 문항이 바뀌면 다시 계산)"""
+    stored = load_answers(version_key)
+    stored = stored[(stored['suspect'] == 0) & (stored['adaptive'] == 0)]
+    return adaptive.simulate(load_questions(version_key), [json.loads(a) for a in stored['answers']])
+
+def display_adaptive_report():
+    st.header("⚡ 적응형 모드 편차 분석")
+    st.caption("저장된 전체 문항 응답을 정답지 삼아 적응형 모드를 재현하고, 전체 문항 채점과 비교합니다.")
+    version_key = st.selectbox("검사 버전", list(VERSION_FILES.keys()), index=1)
+    try:
+        with st.spinner('적응형 모드를 재현하는 중입니다...'):
+            report = cached_adaptive_report(version_key, data_version(), questions_version(version_key))
+    except (sqlite3.Error, FileNotFoundError) as e:
+        st.error(f"편차 분석 중 오류 발생: {e}")
+        return
+    if report['responses'] == 0:
+        st.warning("비교할 전체 문항 응답이 없습니다.")
+        return
+
+    cols = st.columns(4)
+    cols[0].metric("평균 문항 비율", f"{report['items_ratio']:.0%}")
+    cols[1].metric("평균 제출 횟수", f"{report['submissions']:.1f}회", f"일반 모드 {report['full_submissions']}회", delta_color="off")
+    cols[2].metric("과목 점수 평균 절대 차이", f"{report['mean_abs_diff']:.3f}점")
+    cols[3].metric("상위 8과목 일치율", f"{report['top_overlap']:.0%}")
+    chart_df = report['by_subject'].reindex(SUBJECT_ORDER).reset_index()
+    chart_df.columns = ['과목', '평균 절대 차이']
+    st.plotly_chart(px.bar(chart_df, x='과목', y='평균 절대 차이', text_auto='.3f'), use_container_width=True)
+
+def display_export():
+    st.header("📥 응답 내보내기")
+    st.caption("저장된 응답과 과목별 점수를 파일로 내보냅니다. 조건은 저장소에서 바로 걸러지며, 파일은 묶음 단위로 기록됩니다.")
+    try:
+        classes = list_classes()
+    except sqlite3.Error as e:
+        st.error(f"응답 저장소를 읽는 중 오류 발생: {e}")
+        return
+
+    cols = st.columns(3)
+    class_name = cols[0].selectbox("반", ['(전체)'] + classes, format_func=lambda x: x or '(미입력)')
+    version_key = cols[1].selectbox("검사 버전", ['(전체)'] + list(VERSION_FILES.keys()))
+    fmt = cols[2].selectbox("형식", ['xlsx', 'parquet'])
+    cols = st.columns(3)
+    since = cols[0].date_input("시작 날짜", value=None)
+    until = cols[1].date_input("끝 날짜", value=None)
+    include_suspect = cols[2].checkbox("불성실 의심 응답 포함", value=True)
+
+    if st.button("파일 만들기"):
+        fd, path = tempfile.mkstemp(suffix=f".{fmt}")
+        os.close(fd)
+        try:
+            with st.spinner('파일을 만드는 중입니다...'):
+                count = export.export(path, fmt,
+                                      None if class_name == '(전체)' else class_name,
+                                      None if version_key == '(전체)' else version_key,
+                                      since.isoformat() if since else None,
+                                      until.isoformat() if until else None,
+                                      include_suspect)
+            with open(path, 'rb') as f:
+                st.download_button(f"{count}건 내려받기", f, file_name=f"responses.{fmt}")
+        except (sqlite3.Error, RuntimeError, OSError) as e:
+            st.error(f"내보내기 중 오류 발생: {e}")
+        finally:
+            os.remove(path)
+
 # --- 메인 로직 분기 ---
 # 일반 사용자 플로우
 version = st.radio(
@@ -299,27 +478,57 @@ version = st.radio(
     index=None,
     horizontal=True
 )
+adaptive_mode = st.toggle("⚡ 적응형 모드 (과목 순위가 안정되면 남은 문항을 묻지 않습니다)")
+st.text_input("학년-반 (선택, 예: 2-3)", key='class_name', max_chars=10)
 
-if st.session_state.show_dev_results:
+if st.session_state.dev_view == 'adaptive':
+    display_adaptive_report()
+elif st.session_state.dev_view == 'forecast':
+    display_forecast()
+elif st.session_state.dev_view == 'export':
+    display_export()
+elif st.session_state.show_dev_results:
     st.warning("개발자 모드가 활성화되었습니다. 랜덤 응답으로 결과 페이지를 표시합니다.")
-    df_dev = load_data('default_data.csv')
+    df_dev = get_questions('default')
     if df_dev is not None:
         st.session_state.responses = {str(q_id): random.randint(1, 5) for q_id in df_dev['번호']}
         display_results(df_dev, is_dev_mode=True)
     else:
         st.error("개발자 모드를 위해 default_data.csv 파일이 필요합니다.")
 elif version:
-    if 'version' not in st.session_state or st.session_state.version != version:
+    version_key = 'lite' if '라이트' in version else 'default'
+    try:
+        bank_version = questions_version(version_key)
+    except OSError:
+        bank_version = None
+    # 검사 도중 스냅샷 게시나 CSV 수정으로 문항이 바뀌면 저장해 둔 문항 번호(order_, plan_)가 맞지 않으므로 처음부터 다시 시작
+    bank_changed = (st.session_state.get('questions_version') not in (None, bank_version)
+                    and not st.session_state.get('show_results', False))
+    if ('version' not in st.session_state or st.session_state.version != version
+            or st.session_state.get('adaptive', False) != adaptive_mode or bank_changed):
         st.session_state.version = version
+        st.session_state.adaptive = adaptive_mode
         st.session_state.current_section = 0
+        st.session_state.adaptive_round = 0
         st.session_state.responses = {}
         st.session_state.show_results = False
+        st.session_state.response_saved = False
+        st.session_state.section_started = {}
+        st.session_state.section_times = {}
+        for key in [k for k in st.session_state if k.startswith(('order_', 'plan_', 'q_'))]:
+            del st.session_state[key]
+        if bank_changed:
+            st.info("검사 문항이 업데이트되어 처음부터 다시 시작합니다.")
+    if not st.session_state.get('show_results', False):
+        st.session_state.questions_version = bank_version
 
-    file_to_load = 'lite_data.csv' if '라이트' in version else 'default_data.csv'
-    df = load_data(file_to_load)
+    st.session_state.version_key = version_key
+    df = get_questions(st.session_state.version_key)
     if df is not None:
         if st.session_state.get('show_results', False):
              display_results(df)
+        elif st.session_state.adaptive:
+             display_adaptive_survey(df)
         else:
              display_survey(df)
 else:
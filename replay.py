@@ -0,0 +1,367 @@
+"""검사 세션을 기록해 두었다가 원하는 리비전의 채점 코드로 다시 채점해 보는 회귀 확인 스크립트
+
+CSV(name_map 약어, 관련교과군3 문항, 섹션 순서 등)나 채점 코드를 고친 뒤, 같은 세션들을 다시 채점해
+과목별 점수가 달라졌는지와 단계별 소요 시간이 어떻게 변했는지를 함께 보여줍니다.
+
+세션 기록은 gzip으로 압축한 JSON Lines 파일입니다. 첫 줄은 머리글이고, 이후 한 줄에 세션 하나씩
+검사 버전, 적응형 여부, 문항을 보여준 순서, 그 순서대로의 응답(1~5 숫자 문자열), 기록 당시 점수를 담습니다.
+
+다시 채점할 때는 리비전마다 git archive로 트리를 임시 폴더에 풀고, 그 폴더에서 격리 모드(python -I)로 새 프로세스를 띄워
+그 리비전의 scoring.py와 문항 CSV로 채점합니다. (scoring.py가 없는 리비전은 지원하지 않습니다.)
+
+사용법:
+    python replay.py record -o sessions.jsonl.gz                    # 저장된 응답을 기록
+    python replay.py record -o sessions.jsonl.gz --synthetic 500    # 가상 응답을 만들어 기록
+    python replay.py replay sessions.jsonl.gz                       # 기록 당시 점수 vs 작업 트리
+    python replay.py replay sessions.jsonl.gz --rev HEAD~1 --rev WORKTREE   # 두 리비전 비교
+"""
+import argparse
+import gzip
+import inspect
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# 채점 관련 모듈(scoring 등)은 함수 안에서 불러옵니다.
+# 다시 채점하는 작업 프로세스가 이 파일이 아니라 대상 리비전의 scoring.py를 불러와야 하기 때문입니다.
+
+LOG_FORMAT = 1
+WORKTREE = 'WORKTREE'
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+TOLERANCE = 1e-9
+REPEAT = 3
+
+
+# --- 기록 ---
+
+def encode_session(session_id, version, answers, scores, adaptive=False):
+    """응답 딕셔너리(보여준 순서대로)를 기록 한 줄로 바꾸는 함수 (1~5가 아닌 응답이 있으면 None)"""
+    values = list(answers.values())
+    if not all(isinstance(v, (int, np.integer)) and 1 <= v <= 5 for v in values):
+        return None
+    return {
+        'id': session_id,
+        'version': version,
+        'adaptive': bool(adaptive),
+        'order': [str(q) for q in answers],
+        'answers': ''.join(str(int(v)) for v in values),
+        'scores': {subject: float(score) for subject, score in scores.items()},
+    }
+
+
+def decode_answers(session):
+    """기록 한 줄을 보여준 순서대로의 응답 딕셔너리로 되돌리는 함수"""
+    return {q: int(v) for q, v in zip(session['order'], session['answers'])}
+
+
+def write_log(sessions, output, source):
+    """세션 기록 파일을 쓰고 기록한 세션 수를 돌려주는 함수"""
+    header = {'format': LOG_FORMAT, 'created_at': datetime.now().isoformat(timespec='seconds'),
+              'source': source, 'revision': git_revision('HEAD')}
+    count = 0
+    with gzip.open(output, 'wt', encoding='utf-8') as f:
+        f.write(json.dumps(header, ensure_ascii=False) + '\n')
+        for session in sessions:
+            f.write(json.dumps(session, ensure_ascii=False, separators=(',', ':')) + '\n')
+            count += 1
+    return count
+
+
+def read_log(path):
+    """세션 기록 파일을 (머리글, 세션 목록)으로 읽는 함수"""
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        header = json.loads(f.readline())
+        if header.get('format') != LOG_FORMAT:
+            raise ValueError(f"지원하지 않는 기록 형식입니다: {header.get('format')}")
+        return header, [json.loads(line) for line in f if line.strip()]
+
+
+def stored_sessions(version=None, include_suspect=True, db_path=None):
+    """저장된 응답을 기록용 세션으로 바꾸는 함수 (응답 JSON의 키 순서가 보여준 순서)"""
+    from storage import DB_PATH, iter_responses
+    from scoring import SUBJECT_ORDER
+
+    for row in iter_responses(version=version, include_suspect=include_suspect, db_path=db_path or DB_PATH):
+        scores = {s: row[s] for s in SUBJECT_ORDER if row[s] is not None}
+        session = encode_session(row['id'], row['version'], json.loads(row['answers']), scores, row['adaptive'])
+        if session is not None:
+            yield session
+
+
+def synthetic_sessions(count, versions=None, seed=0, adaptive_share=0.25):
+    """가상 학생 응답을 만들어 기록용 세션으로 돌려주는 함수
+
+    학생마다 과목 선호도를 정규분포로 뽑고, 문항 응답은 관련 과목 선호도(역 문항은 부호 반대)에
+    잡음을 더해 1~5로 자릅니다. 문항 순서는 화면과 같이 SECTION_ORDER 순서의 섹션 안에서 섞고,
+    adaptive_share 비율만큼은 적응형 모드로 실제 보여줄 문항만 남깁니다.
+    """
+    from scoring import SECTION_ORDER, VERSION_FILES, read_questions, build_item_matrix, compute_scores
+    import adaptive
+
+    rng = np.random.default_rng(seed)
+    versions = versions or list(VERSION_FILES)
+    data = {}
+    for version_key in versions:
+        df = read_questions(VERSION_FILES[version_key])
+        model = build_item_matrix(df)
+        sections = adaptive.section_items(df)
+        data[version_key] = (df, model, sections)
+
+    for i in range(count):
+        version_key = versions[i % len(versions)]
+        df, model, sections = data[version_key]
+        preference = rng.normal(size=len(model['subjects']))
+        counts = np.maximum(model['incidence'].sum(axis=1), 1)
+        tendency = model['sign'] @ preference / counts
+        values = np.clip(np.rint(3 + tendency + rng.normal(scale=0.8, size=len(tendency))), 1, 5).astype(int)
+        by_id = dict(zip(model['q_ids'], values.tolist()))
+
+        answers = {}
+        for section_name in SECTION_ORDER:
+            for q in rng.permutation(sections.get(section_name, [])).tolist():
+                answers[q] = by_id[q]
+        is_adaptive = bool(rng.random() < adaptive_share)
+        if is_adaptive:
+            answers, _ = adaptive.run_adaptive(model, sections, answers, rng)
+        scores = compute_scores(df, answers, answered_only=is_adaptive, model=model)
+        yield encode_session(i + 1, version_key, answers, scores, is_adaptive)
+
+
+# --- 다시 채점 (작업 프로세스) ---
+
+def run_worker(log_path, repeat=REPEAT):
+    """현재 폴더의 scoring.py와 문항 CSV로 세션을 다시 채점하고 점수와 단계별 소요 시간을 돌려주는 함수
+
+    이 함수는 대상 리비전을 푼 폴더에서 새 프로세스로 실행됩니다.
+    """
+    # python -I로 실행되므로 PYTHONPATH와 이 파일이 있는 폴더는 sys.path에 없음 (대상 리비전 폴더만 추가)
+    sys.path.insert(0, os.getcwd())
+    try:
+        import scoring
+    except ImportError:
+        raise SystemExit("이 리비전에는 scoring.py가 없어 다시 채점할 수 없습니다.")
+    if os.path.dirname(os.path.abspath(scoring.__file__)) != os.getcwd():
+        raise SystemExit(f"대상 리비전이 아닌 {scoring.__file__}를 불러왔습니다.")
+    timings = {}
+    # 채점 행렬을 넘겨받지 못하는 예전 compute_scores는 학생마다 행렬을 다시 만드는 것까지가 실제 비용
+    takes_model = 'model' in inspect.signature(scoring.compute_scores).parameters
+
+    _, sessions = read_log(log_path)
+    by_version = {}
+    for index, session in enumerate(sessions):
+        by_version.setdefault(session['version'], []).append(index)
+
+    scores = [None] * len(sessions)
+    for version_key, indexes in by_version.items():
+        file_path = scoring.VERSION_FILES[version_key]
+        stage = {}
+        df, stage['read_questions'] = _best_of(repeat, scoring.read_questions, file_path)
+        model, stage['build_item_matrix'] = _best_of(repeat, scoring.build_item_matrix, df)
+        kwargs = {'model': model} if takes_model else {}
+
+        # 결과 페이지와 같은 경로: 학생 한 명씩 compute_scores
+        per_session = []
+        for _ in range(repeat):
+            for index in indexes:
+                session = sessions[index]
+                answers = decode_answers(session)
+                t0 = time.perf_counter()
+                scores[index] = scoring.compute_scores(df, answers, answered_only=session['adaptive'], **kwargs)
+                per_session.append(time.perf_counter() - t0)
+        stage['compute_scores_p50'] = float(np.percentile(per_session, 50))
+        stage['compute_scores_p95'] = float(np.percentile(per_session, 95))
+
+        # 집계에서 쓰는 경로: 여러 학생을 한 번에 score_matrix (적응형 여부별로 나눔)
+        batch_total = 0.0
+        for is_adaptive in (False, True):
+            answers_list = [decode_answers(sessions[i]) for i in indexes if sessions[i]['adaptive'] == is_adaptive]
+            if answers_list:
+                _, elapsed = _best_of(repeat, lambda: scoring.score_matrix(
+                    model, scoring.answers_to_matrix(model, answers_list), answered_only=is_adaptive))
+                batch_total += elapsed
+        stage['score_matrix_batch'] = batch_total
+        timings[version_key] = stage
+
+    return {'scores': scores, 'timings': timings, 'sessions': len(sessions)}
+
+
+def _best_of(repeat, func, *args):
+    """repeat번 실행해 마지막 결과와 가장 짧은 소요 시간을 돌려주는 함수"""
+    best, result = float('inf'), None
+    for _ in range(max(repeat, 1)):
+        t0 = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - t0)
+    return result, best
+
+
+# --- 다시 채점 (리비전 준비와 비교) ---
+
+def git_revision(rev):
+    """리비전의 짧은 커밋 해시 (git 저장소가 아니면 None)"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', rev], cwd=REPO_DIR, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def replay_revision(log_path, rev=WORKTREE, repeat=REPEAT):
+    """한 리비전으로 세션을 다시 채점하는 함수 (WORKTREE는 커밋하지 않은 변경까지 포함한 현재 폴더)"""
+    log_path = os.path.abspath(log_path)
+    tree = REPO_DIR
+    if rev != WORKTREE:
+        tree = tempfile.mkdtemp(prefix='replay-')
+        archive = subprocess.run(['git', 'archive', '--format=tar', rev], cwd=REPO_DIR, capture_output=True)
+        if archive.returncode != 0:
+            shutil.rmtree(tree, ignore_errors=True)
+            raise RuntimeError(f"{rev} 리비전을 가져오지 못했습니다: {archive.stderr.decode(errors='replace').strip()}")
+        with tarfile.open(fileobj=io.BytesIO(archive.stdout)) as tar:
+            tar.extractall(tree)
+    try:
+        proc = subprocess.run([sys.executable, '-I', os.path.abspath(__file__), '_worker', log_path, '--repeat', str(repeat)],
+                              cwd=tree, capture_output=True, text=True)
+    finally:
+        if tree != REPO_DIR:
+            shutil.rmtree(tree, ignore_errors=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{rev} 다시 채점 실패:\n{proc.stderr.strip()}")
+    return json.loads(proc.stdout)
+
+
+def scores_frame(score_dicts, subjects):
+    """세션별 점수 딕셔너리 목록을 (세션 × 과목) 표로 만드는 함수"""
+    return pd.DataFrame(list(score_dicts)).reindex(columns=subjects).astype(float)
+
+
+def diff_scores(reference, result, top_n=8, tolerance=TOLERANCE):
+    """두 (세션 × 과목) 점수표를 비교해 과목별 요약과 상위 N개 과목이 바뀐 세션 수를 돌려주는 함수"""
+    from scoring import top_subjects_mask
+
+    missing = reference.isna() != result.isna()
+    changed = ((result - reference).abs() > tolerance) | missing
+    by_subject = pd.DataFrame({
+        '바뀐 세션 수': changed.sum(),
+        '최대 차이': (result - reference).abs().max(),
+        '점수 생김/사라짐': missing.sum(),
+    })
+    top_changed = (top_subjects_mask(reference, top_n) != top_subjects_mask(result, top_n)).any(axis=1)
+    return {
+        'changed_sessions': int(changed.any(axis=1).sum()),
+        'top_changed_sessions': int(top_changed.sum()),
+        'by_subject': by_subject[by_subject['바뀐 세션 수'] > 0],
+    }
+
+
+def timings_frame(results):
+    """리비전별 단계 소요 시간(ms)을 (버전/단계 × 리비전) 표로 만드는 함수"""
+    rows = {}
+    for name, result in results.items():
+        for version_key, stage in result['timings'].items():
+            for stage_name, seconds in stage.items():
+                rows.setdefault((version_key, stage_name), {})[name] = seconds * 1000
+    table = pd.DataFrame.from_dict(rows, orient='index')[list(results)]
+    table.index.names = ['버전', '단계']
+    if len(results) > 1:
+        first = list(results)[0]
+        for name in list(results)[1:]:
+            table[f'{name}/{first}'] = table[name] / table[first]
+    return table.round(3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="검사 세션을 기록하고 원하는 리비전으로 다시 채점해 비교합니다.")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    rec = sub.add_parser('record', help="저장된 응답 또는 가상 응답을 세션 기록 파일로 저장")
+    rec.add_argument('-o', '--output', required=True, help="세션 기록 파일 (.jsonl.gz)")
+    rec.add_argument('--synthetic', type=int, metavar='N', help="저장된 응답 대신 가상 응답 N개를 만듦")
+    rec.add_argument('--seed', type=int, default=0)
+    rec.add_argument('--adaptive-share', type=float, default=0.25, help="가상 응답 중 적응형 모드 비율")
+    rec.add_argument('--version', help="검사 버전 (기본: 전체)")
+    rec.add_argument('--exclude-suspect', action='store_true', help="불성실 의심 응답 제외")
+    rec.add_argument('--db', help="응답 DB 파일")
+
+    rep = sub.add_parser('replay', help="세션 기록을 다시 채점해 점수 차이와 소요 시간을 비교")
+    rep.add_argument('log', help="세션 기록 파일")
+    rep.add_argument('--rev', action='append', dest='revs', metavar='REV',
+                     help=f"비교할 리비전 (여러 번 지정 가능, 첫 번째가 기준, 현재 폴더는 {WORKTREE}). "
+                          "하나만 주면 기록 당시 점수와 비교")
+    rep.add_argument('--repeat', type=int, default=REPEAT, help="시간을 잴 때 반복 횟수")
+    rep.add_argument('--top-n', type=int, default=8)
+    rep.add_argument('--tolerance', type=float, default=TOLERANCE)
+    rep.add_argument('--report', help="비교 결과를 JSON으로 저장할 파일")
+
+    worker = sub.add_parser('_worker')
+    worker.add_argument('log')
+    worker.add_argument('--repeat', type=int, default=REPEAT)
+
+    args = parser.parse_args()
+
+    if args.command == '_worker':
+        json.dump(run_worker(args.log, args.repeat), sys.stdout, ensure_ascii=False)
+        return
+
+    if args.command == 'record':
+        versions = [args.version] if args.version else None
+        if args.synthetic:
+            sessions = synthetic_sessions(args.synthetic, versions, args.seed, args.adaptive_share)
+            source = f"synthetic(n={args.synthetic}, seed={args.seed}, adaptive_share={args.adaptive_share})"
+        else:
+            sessions = stored_sessions(args.version, not args.exclude_suspect, args.db)
+            source = 'responses'
+        count = write_log(sessions, args.output, source)
+        print(f"세션 {count}개를 {args.output}에 기록했습니다.")
+        return
+
+    from scoring import SUBJECT_ORDER
+
+    header, sessions = read_log(args.log)
+    revs = args.revs or [WORKTREE]
+    try:
+        results = {rev: replay_revision(args.log, rev, args.repeat) for rev in revs}
+    except RuntimeError as e:
+        sys.exit(str(e))
+    if len(revs) == 1:
+        reference_name = f"기록 당시({header.get('revision') or '?'})"
+        reference = scores_frame([s['scores'] for s in sessions], SUBJECT_ORDER)
+        compared = revs
+    else:
+        reference_name = revs[0]
+        reference = scores_frame(results[revs[0]]['scores'], SUBJECT_ORDER)
+        compared = revs[1:]
+
+    print(f"세션 {len(sessions)}개 ({header.get('source')}), 기준: {reference_name}")
+    report = {'log': args.log, 'reference': reference_name, 'diffs': {}}
+    failed = False
+    for rev in compared:
+        diff = diff_scores(reference, scores_frame(results[rev]['scores'], SUBJECT_ORDER), args.top_n, args.tolerance)
+        print(f"\n[{rev}] 점수가 바뀐 세션 {diff['changed_sessions']}개, 상위 {args.top_n}개 과목이 바뀐 세션 {diff['top_changed_sessions']}개")
+        if not diff['by_subject'].empty:
+            print(diff['by_subject'].to_string())
+            failed = True
+        report['diffs'][rev] = {**diff, 'by_subject': diff['by_subject'].to_dict(orient='index')}
+
+    timings = timings_frame(results)
+    print("\n단계별 소요 시간 (ms, compute_scores는 학생 한 명당)")
+    print(timings.to_string())
+
+    if args.report:
+        report['timings'] = {f'{v}/{s}': row for (v, s), row in timings.to_dict(orient='index').items()}
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2, default=float)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
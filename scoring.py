@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+
+# --- 데이터 상수 정의 ---
+SUBJECT_ORDER = ['국어', '수학', '영어', '독일어', '중국어', '일본어', '물리', '화학', '생명과학', '지구과학', '일반사회', '역사', '윤리', '지리']
+SECTION_ORDER = ['기초교과군', '제2외국어군', '과학군', '사회군']
+# 교과군별 과목 정보를 딕셔너리로 정의
+GROUP_TO_SUBJECTS_MAP = {
+    '기초교과군': ['국어', '수학', '영어'],
+    '제2외국어군': ['독일어', '중국어', '일본어'],
+    '과학군': ['물리', '화학', '생명과학', '지구과학'],
+    '사회군': ['일반사회', '역사', '윤리', '지리']
+}
+# 검사 버전별 문항 파일
+VERSION_FILES = {'lite': 'lite_data.csv', 'default': 'default_data.csv'}
+# (관련교과군 열, 척도 열) 쌍
+SUBJECT_COLUMNS = [('관련교과군', '척도'), ('관련교과군2', '척도2'), ('관련교과군3', '척도3')]
+NAME_MAP = {'생명': '생명과학', '지구': '지구과학', '일사': '일반사회'}
+
+
+def read_questions(file_path):
+    """문항 CSV 파일을 읽고 정리하는 함수 (Streamlit 없이도 사용 가능)"""
+    df = pd.read_csv(file_path, dtype={'번호': str})
+    df.columns = df.columns.str.strip()
+
+    for col, _ in SUBJECT_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].apply(lambda x: x.strip() if isinstance(x, str) else x)
+            df[col] = df[col].replace(NAME_MAP)
+
+    return df
+
+
+def build_item_matrix(df):
+    """문항 × 과목 채점 행렬을 만드는 함수
+
+    sign: 정 문항은 +1, 역 문항은 -1 (역 문항 점수는 6 - 응답)
+    reverse: 역 문항이면 1 (응답한 역 문항마다 6점을 더함)
+    incidence: 문항이 과목에 연결된 횟수
+    """
+    q_ids = df['번호'].astype(str).tolist()
+    subject_index = {subject: j for j, subject in enumerate(SUBJECT_ORDER)}
+    shape = (len(df), len(SUBJECT_ORDER))
+    sign = np.zeros(shape)
+    reverse = np.zeros(shape)
+    incidence = np.zeros(shape)
+
+    rows = np.arange(len(df))
+    for subject_col, scale_col in SUBJECT_COLUMNS:
+        if subject_col not in df.columns:
+            continue
+        cols = df[subject_col].map(subject_index).to_numpy(dtype=float)
+        mask = ~np.isnan(cols)
+        is_reverse = (df[scale_col] == '역').to_numpy() if scale_col in df.columns else np.zeros(len(df), dtype=bool)
+        r, c = rows[mask], cols[mask].astype(int)
+        np.add.at(sign, (r, c), np.where(is_reverse[mask], -1.0, 1.0))
+        np.add.at(reverse, (r, c), is_reverse[mask].astype(float))
+        np.add.at(incidence, (r, c), 1.0)
+
+    return {'q_ids': q_ids, 'subjects': list(SUBJECT_ORDER), 'sign': sign, 'reverse': reverse, 'incidence': incidence}
+
+
+def answers_to_matrix(model, answers_list):
+    """응답 딕셔너리 목록을 (응답자 × 문항) 배열로 바꾸는 함수 (미응답은 NaN)"""
+    answers_list = list(answers_list)
+    frame = pd.DataFrame(answers_list, index=range(len(answers_list)))
+    frame.columns = frame.columns.astype(str)
+    return frame.reindex(columns=model['q_ids']).to_numpy(dtype=float)
+
+
+def score_matrix(model, answers, answered_only=False):
+    """(응답자 × 문항) 응답 배열로 과목별 평균 점수를 한 번에 계산하는 함수
+
+    기본값은 기존 결과 페이지와 같이 과목별 전체 문항 수로 나누고,
+    answered_only=True이면 실제로 응답한 문항 수로 나눕니다. 문항이 없는 과목은 NaN입니다.
+    """
+    answered = ~np.isnan(answers)
+    filled = np.where(answered, answers, 0.0)
+    totals = filled @ model['sign'] + 6.0 * (answered @ model['reverse'])
+    if answered_only:
+        counts = answered @ model['incidence']
+    else:
+        counts = np.broadcast_to(model['incidence'].sum(axis=0), totals.shape)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(counts > 0, totals / counts, np.nan)
+
+
+def compute_scores(df, responses, answered_only=False, model=None):
+    """한 학생의 응답으로 과목별 평균 점수를 계산하는 함수 (SUBJECT_ORDER 순서, 문항이 없는 과목 제외)
+
+    model을 주면(예: 공유 스냅샷의 채점 행렬) 다시 만들지 않고 그대로 사용합니다.
+    """
+    if model is None:
+        model = build_item_matrix(df)
+    scores = score_matrix(model, answers_to_matrix(model, [responses]), answered_only)[0]
+    return {subject: float(score) for subject, score in zip(model['subjects'], scores) if not np.isnan(score)}
+
+
+def top_subjects_mask(scores, top_n):
+    """(응답자 × 과목) 점수표에서 학생별 상위 N개 과목 여부를 구하는 함수
+
+    동점은 결과 페이지의 정렬과 같이 SUBJECT_ORDER 앞쪽 과목이 우선합니다.
+    """
+    return scores.rank(axis=1, ascending=False, method='first') <= top_n
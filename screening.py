@@ -0,0 +1,115 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from scoring import build_item_matrix, answers_to_matrix
+from storage import DB_PATH, load_answers, update_flags
+from shared_data import SHARED_DIR, load_questions
+
+# 불성실 응답 판정 기준
+STRAIGHT_LINE_SHARE = 0.9       # 같은 번호 응답 비율이 이 이상이면 일자 응답
+ALTERNATING_SHARE = 0.8         # 일정한 주기로 번갈아 고른 비율이 이 이상이면 교대 응답
+ALTERNATING_LAGS = (2, 3)       # 1-5-1-5 / 1-3-5-1-3-5 같은 주기
+INCONSISTENCY_GAP = 2.0         # 같은 과목의 정/역 문항 평균 차이(역채점 후)가 이 이상이면 모순 응답
+MIN_SECONDS_PER_ITEM = 1.5      # 문항당 평균 응답 시간이 이보다 짧으면 너무 빠른 응답
+MIN_ITEMS = 10                  # 이보다 적게 응답한 경우 패턴 판정을 하지 않음
+
+FLAG_COLUMNS = ['straight_lining', 'alternating', 'inconsistent', 'too_fast']
+
+
+def _sequence_matrix(answers_list):
+    """응답을 화면에 표시된(저장된) 순서대로 (응답자 × 위치) 배열로 바꾸는 함수 (빈 칸은 NaN)"""
+    frame = pd.DataFrame([list(answers.values()) for answers in answers_list])
+    return frame.to_numpy(dtype=float) if frame.size else np.full((len(answers_list), 0), np.nan)
+
+
+def _lag_share(sequence, lag):
+    """lag칸 뒤와 같고 바로 다음과는 다른 응답의 비율 (주기적인 교대 패턴)"""
+    if sequence.shape[1] <= lag:
+        return np.zeros(len(sequence))
+    head, step, tail = sequence[:, :-lag], sequence[:, 1:sequence.shape[1] - lag + 1], sequence[:, lag:]
+    valid = ~np.isnan(head) & ~np.isnan(tail)
+    hits = valid & (head == tail) & (head != step)
+    with np.errstate(invalid='ignore'):
+        return np.where(valid.sum(axis=1) > 0, hits.sum(axis=1) / valid.sum(axis=1), 0.0)
+
+
+def screen_responses(df, answers_list, section_times_list=None):
+    """응답 묶음 전체를 한 번에 검사해 불성실 응답 여부를 표로 돌려주는 함수
+
+    answers_list: 표시된 순서대로 저장된 {번호: 응답} 딕셔너리 목록
+    section_times_list: 섹션별 소요 시간(초) 딕셔너리 목록 (없으면 시간 판정 생략)
+    """
+    answers_list = list(answers_list)
+    model = build_item_matrix(df)
+    aligned = answers_to_matrix(model, answers_list)
+    answered = ~np.isnan(aligned)
+    n_answered = answered.sum(axis=1)
+    enough = n_answered >= MIN_ITEMS
+
+    # 일자 응답: 가장 많이 고른 번호의 비율
+    value_counts = np.stack([(aligned == v).sum(axis=1) for v in range(1, 6)], axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mode_share = np.where(n_answered > 0, value_counts.max(axis=1) / n_answered, 0.0)
+    straight = enough & (mode_share >= STRAIGHT_LINE_SHARE)
+
+    # 교대 응답: 표시 순서에서 일정 주기로 같은 번호가 반복
+    sequence = _sequence_matrix(answers_list)
+    alternating_share = np.max([_lag_share(sequence, lag) for lag in ALTERNATING_LAGS], axis=0)
+    alternating = enough & ~straight & (alternating_share >= ALTERNATING_SHARE)
+
+    # 모순 응답: 같은 과목의 정 문항 평균과 역 문항(역채점) 평균의 차이
+    positive = ((model['incidence'] > 0) & (model['reverse'] == 0)).astype(float)
+    negative = (model['reverse'] > 0).astype(float)
+    filled = np.where(answered, aligned, 0.0)
+    pos_count, neg_count = answered @ positive, answered @ negative
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pos_mean = (filled @ positive) / pos_count
+        neg_mean = 6.0 - (filled @ negative) / neg_count
+        gaps = np.where((pos_count > 0) & (neg_count > 0), np.abs(pos_mean - neg_mean), np.nan)
+        mean_gap = np.nanmean(np.where(np.isnan(gaps).all(axis=1, keepdims=True), 0.0, gaps), axis=1)
+    inconsistent = enough & (mean_gap >= INCONSISTENCY_GAP)
+
+    # 너무 빠른 응답: 섹션 소요 시간 합 / 응답 문항 수
+    if section_times_list is not None:
+        times = pd.DataFrame.from_records([t or {} for t in section_times_list], index=range(len(answers_list)))
+        total_seconds = times.sum(axis=1, min_count=1).to_numpy(dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            too_fast = (n_answered > 0) & (total_seconds / n_answered < MIN_SECONDS_PER_ITEM)
+    else:
+        too_fast = np.zeros(len(answers_list), dtype=bool)
+
+    result = pd.DataFrame({
+        'straight_lining': straight,
+        'alternating': alternating,
+        'inconsistent': inconsistent,
+        'too_fast': too_fast,
+    })
+    result['suspect'] = result[FLAG_COLUMNS].any(axis=1)
+    return result
+
+
+def flag_names(row):
+    """screen_responses 결과 한 행에서 걸린 항목 이름 목록을 만드는 함수"""
+    return [name for name in FLAG_COLUMNS if row[name]]
+
+
+def screen_one(df, answers, section_times=None):
+    """한 학생의 응답을 검사해 걸린 항목 이름 목록을 돌려주는 함수"""
+    result = screen_responses(df, [answers], None if section_times is None else [section_times])
+    return flag_names(result.iloc[0])
+
+
+def rescreen_all(db_path=DB_PATH, root=SHARED_DIR):
+    """저장된 모든 응답을 버전별로 한 번에 다시 검사해 의심 표시를 갱신하는 함수 (기준을 바꾼 뒤 사용)"""
+    stored = load_answers(db_path=db_path)
+    updates = []
+    for version, group in stored.groupby('version'):
+        df = load_questions(version, root)
+        answers_list = [json.loads(a) for a in group['answers']]
+        times_list = [json.loads(t) if t else None for t in group['section_times']]
+        result = screen_responses(df, answers_list, times_list)
+        updates += [(int(rid), flag_names(row)) for rid, (_, row) in zip(group['id'], result.iterrows())]
+    update_flags(updates, db_path=db_path)
+    return sum(1 for _, flags in updates if flags), len(updates)
@@ -0,0 +1,187 @@
+"""여러 Streamlit 서버 프로세스가 함께 쓰는 읽기 전용 데이터(문항, 교육과정 표, 응답 집계) 스냅샷
+
+스냅샷은 shared/<버전>/ 아래에 만들어지고, shared/CURRENT 파일이 현재 버전을 가리킵니다.
+숫자 배열(채점 행렬, 응답자 × 과목 점수)은 .npy로 저장해 각 프로세스가 np.load(mmap_mode='r')로
+복사 없이 매핑하므로, 같은 파일의 페이지 캐시를 모든 프로세스가 공유합니다.
+새 스냅샷은 임시 폴더에 다 쓴 뒤 이름을 바꾸고 CURRENT를 os.replace로 교체하므로,
+읽는 쪽은 항상 완성된 한 버전만 보게 됩니다.
+
+사용법:
+    python shared_data.py publish   # CSV와 저장된 응답으로 새 스냅샷 게시
+    python shared_data.py status    # 현재 스냅샷 버전 확인
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from datetime import datetime
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from scoring import SUBJECT_ORDER, VERSION_FILES, read_questions, build_item_matrix
+from forecast import CATALOG_FILES, read_curriculum_table
+from storage import DB_PATH, load_scores, data_version
+
+SHARED_DIR = 'shared'
+POINTER = 'CURRENT'
+KEEP_SNAPSHOTS = 3
+MATRIX_NAMES = ('sign', 'reverse', 'incidence')
+
+_lock = threading.Lock()
+_current = {'version': None, 'snapshot': None}
+
+
+def _frame_to_json(df):
+    return json.loads(df.to_json(orient='split', force_ascii=False, index=False))
+
+
+def _frame_from_json(data):
+    return pd.DataFrame(data['data'], columns=data['columns']).fillna(np.nan)
+
+
+def publish(root=SHARED_DIR, db_path=DB_PATH):
+    """현재 CSV와 저장된 응답으로 새 스냅샷을 만들고 CURRENT를 원자적으로 바꾸는 함수"""
+    os.makedirs(root, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix='.staging-', dir=root)
+    try:
+        meta = {'questions': {}, 'catalogs': {}}
+        for version_key, file_path in VERSION_FILES.items():
+            df = read_questions(file_path)
+            model = build_item_matrix(df)
+            for name in MATRIX_NAMES:
+                np.save(os.path.join(staging, f'{version_key}_{name}.npy'), model[name])
+            meta['questions'][version_key] = _frame_to_json(df)
+        for file_path in CATALOG_FILES.values():
+            meta['catalogs'][file_path] = _frame_to_json(read_curriculum_table(file_path))
+
+        # 응답 집계 (의심 응답 제외)
+        # 집계 전에 키를 읽어 두면 그 사이 응답이 들어와도 스냅샷이 최신이라고 잘못 판단하지 않음
+        cohort_version = data_version(db_path)
+        scores = load_scores(db_path=db_path)
+        np.save(os.path.join(staging, 'cohort_scores.npy'), scores.to_numpy(dtype=float))
+        meta['cohort'] = {
+            'response_ids': scores.index.tolist(),
+            'subjects': scores.columns.tolist(),
+            'data_version': cohort_version,
+        }
+        with open(os.path.join(staging, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+        digest = hashlib.sha256()
+        for name in sorted(os.listdir(staging)):
+            with open(os.path.join(staging, name), 'rb') as f:
+                digest.update(name.encode('utf-8') + f.read())
+        version = f"{datetime.now():%Y%m%dT%H%M%S}-{digest.hexdigest()[:10]}"
+        os.rename(staging, os.path.join(root, version))
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    pointer_tmp = os.path.join(root, f'.{POINTER}.{os.getpid()}')
+    with open(pointer_tmp, 'w', encoding='utf-8') as f:
+        f.write(version)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(pointer_tmp, os.path.join(root, POINTER))
+    prune(root)
+    return version
+
+
+def prune(root=SHARED_DIR, keep=KEEP_SNAPSHOTS):
+    """오래된 스냅샷을 지우는 함수 (이미 매핑한 프로세스는 파일이 지워져도 계속 읽을 수 있음)"""
+    current = current_version(root)
+    versions = sorted(name for name in os.listdir(root) if not name.startswith('.') and name != POINTER)
+    for name in versions[:-keep]:
+        if name != current:
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+
+def current_version(root=SHARED_DIR):
+    """CURRENT가 가리키는 스냅샷 버전 (없으면 None)"""
+    try:
+        with open(os.path.join(root, POINTER), encoding='utf-8') as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _map_snapshot(path, version):
+    with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+        meta = json.load(f)
+    questions, models = {}, {}
+    for version_key, data in meta['questions'].items():
+        questions[version_key] = _frame_from_json(data)
+        models[version_key] = {name: np.load(os.path.join(path, f'{version_key}_{name}.npy'), mmap_mode='r')
+                               for name in MATRIX_NAMES}
+        models[version_key]['q_ids'] = questions[version_key]['번호'].astype(str).tolist()
+        models[version_key]['subjects'] = list(SUBJECT_ORDER)
+    cohort = meta['cohort']
+    return {
+        'version': version,
+        'questions': questions,
+        'models': models,
+        'catalogs': {file_path: _frame_from_json(data) for file_path, data in meta['catalogs'].items()},
+        'cohort_scores': pd.DataFrame(np.load(os.path.join(path, 'cohort_scores.npy'), mmap_mode='r'),
+                                      index=pd.Index(cohort['response_ids'], name='response_id'),
+                                      columns=cohort['subjects'], copy=False),
+        'data_version': cohort.get('data_version'),   # 이전 형식 스냅샷은 항상 최신이 아닌 것으로 봄
+    }
+
+
+def current_snapshot(root=SHARED_DIR):
+    """현재 스냅샷을 돌려주는 함수 (CURRENT가 바뀌었을 때만 새로 매핑, 스냅샷이 없으면 None)
+
+    돌려받은 표와 배열은 프로세스 안의 모든 세션이 함께 쓰므로 수정하지 말아야 합니다.
+    """
+    version = current_version(root)
+    if version is None:
+        return None
+    with _lock:
+        if _current['version'] != version:
+            _current['snapshot'] = _map_snapshot(os.path.join(root, version), version)
+            _current['version'] = version
+        return _current['snapshot']
+
+
+@lru_cache(maxsize=8)
+def _csv_questions(file_path, mtime):
+    return read_questions(file_path)
+
+
+def load_questions(version_key, root=SHARED_DIR):
+    """학생에게 보여주는 문항 (스냅샷이 게시되어 있으면 스냅샷 문항, 없으면 CSV)
+
+    채점, 불성실 응답 재검사, 업로드 재채점이 모두 이 함수를 거쳐야 학생이 본 문항과 같은 문항으로 계산됩니다.
+    CSV는 수정 시각이 바뀔 때만 다시 읽습니다. 돌려받은 표는 함께 쓰므로 수정하지 말아야 합니다.
+    """
+    snapshot = current_snapshot(root)
+    if snapshot is not None:
+        return snapshot['questions'][version_key]
+    file_path = VERSION_FILES[version_key]
+    return _csv_questions(file_path, os.path.getmtime(file_path))
+
+
+def questions_version(version_key, root=SHARED_DIR):
+    """load_questions 결과가 바뀌었는지 확인하는 캐시 키 (스냅샷 버전 또는 CSV 수정 시각)"""
+    return current_version(root) or f"csv-{os.path.getmtime(VERSION_FILES[version_key])}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="공유 데이터 스냅샷을 관리합니다.")
+    parser.add_argument('command', choices=['publish', 'status'])
+    parser.add_argument('--root', default=SHARED_DIR)
+    parser.add_argument('--db', default=DB_PATH)
+    args = parser.parse_args()
+    if args.command == 'publish':
+        print(publish(args.root, args.db))
+    else:
+        print(current_version(args.root) or "게시된 스냅샷이 없습니다.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+import json
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+
+import pandas as pd
+
+from scoring import SUBJECT_ORDER
+
+DB_PATH = 'responses.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    submitted_at TEXT NOT NULL,
+    version TEXT NOT NULL,
+    answers TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS response_scores (
+    response_id INTEGER NOT NULL REFERENCES responses(id),
+    subject TEXT NOT NULL,
+    score REAL NOT NULL,
+    PRIMARY KEY (response_id, subject)
+);
+CREATE TABLE IF NOT EXISTS data_state (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+# 나중에 추가된 열 (기존 DB 파일에는 ALTER TABLE로 추가)
+ADDED_COLUMNS = [
+    ('section_times', 'TEXT'),
+    ('suspect', 'INTEGER NOT NULL DEFAULT 0'),
+    ('flags', "TEXT NOT NULL DEFAULT ''"),
+    ('adaptive', 'INTEGER NOT NULL DEFAULT 0'),
+    ('class_name', "TEXT NOT NULL DEFAULT ''"),
+]
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_responses_filter ON responses (class_name, version, submitted_at);
+CREATE INDEX IF NOT EXISTS idx_responses_submitted_at ON responses (submitted_at);
+"""
+
+
+def connect(db_path=DB_PATH):
+    """응답 저장소(SQLite)에 연결하고 테이블을 준비하는 함수"""
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA)
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(responses)")}
+    for name, definition in ADDED_COLUMNS:
+        if name not in existing:
+            conn.execute(f"ALTER TABLE responses ADD COLUMN {name} {definition}")
+    conn.executescript(INDEXES)
+    return conn
+
+
+def save_response(version, responses, scores, section_times=None, flags=(), adaptive=False, class_name='', db_path=DB_PATH):
+    """완료된 검사의 응답과 과목별 점수를 저장하고 응답 번호를 돌려주는 함수
+
+    flags에 불성실 응답 항목이 하나라도 있으면 의심 응답으로 표시되어 집계에서 빠집니다.
+    """
+    with closing(connect(db_path)) as conn, conn:
+        cur = conn.execute(
+            "INSERT INTO responses (submitted_at, version, answers, section_times, suspect, flags, adaptive, class_name)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (datetime.now().isoformat(timespec='seconds'), version, json.dumps(responses, ensure_ascii=False),
+             json.dumps(section_times) if section_times is not None else None, int(bool(flags)), ','.join(flags),
+             int(adaptive), (class_name or '').strip())
+        )
+        response_id = cur.lastrowid
+        conn.executemany(
+            "INSERT INTO response_scores (response_id, subject, score) VALUES (?, ?, ?)",
+            [(response_id, subject, score) for subject, score in scores.items()]
+        )
+    return response_id
+
+
+def data_version(db_path=DB_PATH):
+    """집계 결과가 바뀌었는지 확인하는 캐시 키 ('가장 최근 응답 번호-의심 표시 갱신 횟수')
+
+    새 응답이 들어오거나 update_flags로 의심 표시가 바뀌면 값이 달라집니다.
+    """
+    with closing(connect(db_path)) as conn:
+        latest = conn.execute("SELECT COALESCE(MAX(id), 0) FROM responses").fetchone()[0]
+        row = conn.execute("SELECT value FROM data_state WHERE name = 'flags_revision'").fetchone()
+    return f"{latest}-{row[0] if row else 0}"
+
+
+def update_flags(updates, db_path=DB_PATH):
+    """[(응답 번호, 항목 이름 목록), ...]으로 의심 응답 표시를 한 번에 갱신하는 함수"""
+    with closing(connect(db_path)) as conn, conn:
+        conn.executemany(
+            "UPDATE responses SET suspect = ?, flags = ? WHERE id = ?",
+            [(int(bool(flags)), ','.join(flags), response_id) for response_id, flags in updates]
+        )
+        # 응답 번호는 그대로여도 집계가 바뀌므로 캐시 키(data_version)가 달라지도록 횟수를 올림
+        conn.execute(
+            "INSERT INTO data_state (name, value) VALUES ('flags_revision', 1)"
+            " ON CONFLICT(name) DO UPDATE SET value = value + 1"
+        )
+
+
+def load_answers(version=None, db_path=DB_PATH):
+    """저장된 응답 원본(JSON 문자열)을 불러오는 함수"""
+    query = "SELECT id, submitted_at, class_name, version, answers, section_times, suspect, flags, adaptive FROM responses"
+    params = []
+    if version:
+        query += " WHERE version = ?"
+        params.append(version)
+    with closing(connect(db_path)) as conn:
+        return pd.read_sql_query(query + " ORDER BY id", conn, params=params)
+
+
+def load_scores(version=None, include_suspect=False, db_path=DB_PATH):
+    """저장된 응답들의 과목별 점수를 (응답자 × 과목) 표로 불러오는 함수 (기본적으로 의심 응답 제외)"""
+    query = "SELECT s.response_id, s.subject, s.score FROM response_scores s JOIN responses r ON r.id = s.response_id"
+    conditions, params = [], []
+    if version:
+        conditions.append("r.version = ?")
+        params.append(version)
+    if not include_suspect:
+        conditions.append("r.suspect = 0")
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    with closing(connect(db_path)) as conn:
+        long_df = pd.read_sql_query(query, conn, params=params)
+    return long_df.pivot(index='response_id', columns='subject', values='score').reindex(columns=SUBJECT_ORDER)
+
+
+def list_classes(db_path=DB_PATH):
+    """응답이 저장된 반 목록"""
+    with closing(connect(db_path)) as conn:
+        return [row[0] for row in conn.execute("SELECT DISTINCT class_name FROM responses ORDER BY class_name")]
+
+
+def iter_responses(class_name=None, version=None, since=None, until=None, include_suspect=True,
+                   batch_size=500, db_path=DB_PATH):
+    """조건에 맞는 응답을 과목별 점수와 함께 batch_size개씩 읽어 한 행(딕셔너리)씩 돌려주는 제너레이터
+
+    반/버전/기간 조건은 SQL WHERE로 처리하고 점수는 SQL에서 과목별 열로 펼치므로,
+    전체 응답 수와 관계없이 메모리에는 한 묶음만 올라갑니다.
+    since/until은 'YYYY-MM-DD' 또는 ISO 시각 문자열이며 until은 그 시각 이전(미포함)까지입니다.
+    """
+    score_cols = ", ".join(
+        f'MAX(CASE WHEN s.subject = ? THEN s.score END) AS "{subject}"' for subject in SUBJECT_ORDER
+    )
+    params = list(SUBJECT_ORDER)
+    conditions = []
+    if class_name is not None:
+        conditions.append("r.class_name = ?")
+        params.append(class_name)
+    if version:
+        conditions.append("r.version = ?")
+        params.append(version)
+    if since:
+        conditions.append("r.submitted_at >= ?")
+        params.append(since)
+    if until:
+        conditions.append("r.submitted_at < ?")
+        params.append(until)
+    if not include_suspect:
+        conditions.append("r.suspect = 0")
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    query = (
+        "SELECT r.id, r.submitted_at, r.class_name, r.version, r.adaptive, r.suspect, r.flags, r.answers, "
+        f"{score_cols} FROM responses r LEFT JOIN response_scores s ON s.response_id = r.id "
+        f"{where} GROUP BY r.id ORDER BY r.id"
+    )
+    with closing(connect(db_path)) as conn:
+        cur = conn.execute(query, params)
+        names = [d[0] for d in cur.description]
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield dict(zip(names, row))